@@ -3,49 +3,288 @@ Flask Application
 
 A REST API for managing resume data including experience, education, and skills.
 Provides endpoints for CRUD operations on resume components.
+
+Responses are JSON unless the client asks for MessagePack or CBOR in
+``Accept``; request bodies may use those formats too (see ``wire.py``).
+
+The application is built by ``create_app`` so every instance owns its own data
+store. Importing this module is cheap: the default ``app`` is only created the
+first time it is accessed (e.g. by ``flask run`` or ``from app import app``).
 '''
-from flask import Flask, jsonify, request
-from flask_cors import CORS
+import dataclasses
+import threading
+
+from flask import Blueprint, Flask, Response, current_app, request
+from werkzeug.middleware.proxy_fix import ProxyFix
+from changes import ChangeFeed, stream_changes
+from cors import Cors
+from indexes import DuplicateError, UniqueIndexes
 from models import Experience, Education, Skill, Contact
-
-app = Flask(__name__)
-CORS(app)
-
-data = {
-    "experience": [
-        Experience(
-            id=0,
-            title="Software Developer",
-            company="A Cool Company",
-            start_date="October 2022",
-            end_date="Present",
-            description="Writing Python Code",
-            logo="example-logo.png"
-        )
-],
-    "education": [
-        Education(
-            id=0,
-            course="Computer Science",
-            school="University of Tech",
-            start_date="September 2019",
-            end_date="July 2022",
-            grade="80%",
-            logo="example-logo.png"
-        )
-    ],
-    "skill": [
-        Skill(
-            id=0,
-            name="Python",
-            proficiency="1-2 Years",
-            logo="example-logo.png"
-        )
-    ],
-    "contact": None
+from projection import ProjectionError, compile_projection
+from ratelimit import AdmissionController
+from render import FORMATS, FragmentCache, render_resume
+from stats import ResumeStats
+from store import (MODELS, OperationError, apply_batch, create_record, delete_record,
+                   find_position, update_record)
+from sync import SyncExpired, SyncIndex
+from wire import read_body, respond
+
+bp = Blueprint("resume", __name__)
+
+DEFAULT_CONFIG = {
+    "CORS_ENABLED": True,
+    "CORS_ORIGINS": "*",
+    "CORS_MAX_AGE": 7200,
+    "CORS_PREFLIGHT_PATHS": ("/resume/", "/contact"),
+    # Number of reverse proxies in front of the app whose X-Forwarded-For
+    # (and -Proto/-Host) headers are trusted; 0 means the app is reached directly
+    "PROXY_FIX_X_FOR": 0,
+    "RATELIMIT_ENABLED": True,
+    # Callable returning the client key of the current request (default: remote address)
+    "RATELIMIT_KEY_FUNC": None,
+    "RATELIMIT_RATE": 20.0,
+    "RATELIMIT_BURST": 40,
+    "RATELIMIT_ROUTE_LIMITS": {},
+    # Rate and burst shared by all clients of a route (None = no route-wide limit)
+    "RATELIMIT_ROUTE_RATE": None,
+    "RATELIMIT_ROUTE_BURST": None,
+    "RATELIMIT_MAX_CLIENTS": 10000,
+    "MAX_IN_FLIGHT": 64,
+    "SHED_RETRY_AFTER": 1,
+    "MAX_IN_FLIGHT_EXEMPT": ("resume.change_feed",),
+    "CHANGES_BUFFER_SIZE": 1024,
+    "CHANGES_HEARTBEAT": 15.0,
+    # Concurrent /resume/changes streams per process (None = no limit); each
+    # one holds a worker thread for as long as it is open
+    "CHANGES_MAX_STREAMS": 4,
+    "TOMBSTONE_TTL": 7 * 24 * 3600,
+    # Section -> fields that must be unique together, e.g. {"skill": ("name",)}
+    "UNIQUE_CONSTRAINTS": {},
 }
 
-@app.route('/test')
+
+def default_data():
+    '''
+    Build a fresh copy of the seeded resume data.
+
+    Returns:
+        dict: Sections ``experience``, ``education`` and ``skill`` (lists of
+              model objects) and ``contact`` (Contact or None)
+    '''
+    return {
+        "experience": [
+            Experience(
+                id=0,
+                title="Software Developer",
+                company="A Cool Company",
+                start_date="October 2022",
+                end_date="Present",
+                description="Writing Python Code",
+                logo="example-logo.png"
+            )
+        ],
+        "education": [
+            Education(
+                id=0,
+                course="Computer Science",
+                school="University of Tech",
+                start_date="September 2019",
+                end_date="July 2022",
+                grade="80%",
+                logo="example-logo.png"
+            )
+        ],
+        "skill": [
+            Skill(
+                id=0,
+                name="Python",
+                proficiency="1-2 Years",
+                logo="example-logo.png"
+            )
+        ],
+        "contact": None
+    }
+
+
+def create_app(config=None, data=None):
+    '''
+    Create and configure a Flask application instance.
+
+    Args:
+        config (dict, optional): Values that override ``DEFAULT_CONFIG``
+        data (dict, optional): Data store to serve; defaults to a fresh
+                               copy of ``default_data()``
+
+    Returns:
+        flask.Flask: The configured application
+
+    Example:
+        test_app = create_app({"TESTING": True})
+        client = test_app.test_client()
+    '''
+    new_app = Flask(__name__)
+    new_app.config.update(DEFAULT_CONFIG)
+    if config:
+        new_app.config.update(config)
+
+    new_app.extensions["resume_data"] = default_data() if data is None else data
+    new_app.extensions["resume_lock"] = threading.RLock()
+    new_app.extensions["resume_indexes"] = UniqueIndexes(
+        new_app.config["UNIQUE_CONSTRAINTS"], new_app.extensions["resume_data"])
+    new_app.extensions["resume_changes"] = ChangeFeed(new_app.config["CHANGES_BUFFER_SIZE"])
+    max_streams = new_app.config["CHANGES_MAX_STREAMS"]
+    new_app.extensions["resume_streams"] = (
+        None if max_streams is None else threading.BoundedSemaphore(max_streams))
+    new_app.extensions["resume_versions"] = SyncIndex(MODELS, new_app.config["TOMBSTONE_TTL"])
+    new_app.extensions["resume_stats"] = ResumeStats()
+    # The initial records are the first changes, so "?since=0" returns them all.
+    for section in MODELS:
+        for record in new_app.extensions["resume_data"][section]:
+            publish_change("create", section, record, new_app)
+    new_app.extensions["resume_fragments"] = FragmentCache()
+    new_app.register_blueprint(bp)
+
+    proxies = new_app.config["PROXY_FIX_X_FOR"]
+    if proxies:
+        new_app.wsgi_app = ProxyFix(new_app.wsgi_app, x_for=proxies, x_proto=proxies,
+                                    x_host=proxies)
+
+    if new_app.config["RATELIMIT_ENABLED"]:
+        AdmissionController(new_app.config).init_app(new_app)
+
+    if new_app.config["CORS_ENABLED"]:
+        Cors(new_app.config).init_app(new_app)
+
+    return new_app
+
+
+def get_data():
+    '''Return the data store of the application handling the current request.'''
+    return current_app.extensions["resume_data"]
+
+
+def get_lock():
+    '''Return the write lock guarding the current application's data store.'''
+    return current_app.extensions["resume_lock"]
+
+
+def get_indexes():
+    '''Return the uniqueness indexes of the current application's data store.'''
+    return current_app.extensions["resume_indexes"]
+
+
+def publish_change(op, section, record, target_app=None):
+    '''
+    Publish a change to the change feed, record the new version and update
+    the statistics.
+
+    Call while holding the write lock so sequence numbers follow the order in
+    which changes were applied.
+
+    Args:
+        op (str): "create", "update" or "delete"
+        section (str): "experience", "education", "skill" or "contact"
+        record: The model object after the change (before it, for deletes)
+        target_app (flask.Flask, optional): Defaults to the current application
+    '''
+    extensions = (target_app or current_app).extensions
+    event = extensions["resume_changes"].publish(
+        op, section, getattr(record, "id", None), dataclasses.asdict(record))
+    extensions["resume_versions"].record(event)
+    extensions["resume_stats"].record(event)
+
+
+def get_projection(model, from_dict=False):
+    '''
+    Return the serializer selected by the request's ``?fields=`` parameter.
+
+    Args:
+        model (type): Model class of the records being returned
+        from_dict (bool): Whether the records are dicts rather than model objects
+
+    Returns:
+        callable or None: Record -> dict with only the requested fields, or
+                          None if the request has no ``fields`` parameter
+
+    Raises:
+        ProjectionError: If ``fields`` names unknown fields (answered with 400)
+    '''
+    spec = request.args.get("fields")
+    return None if spec is None else compile_projection(model, spec, from_dict)
+
+
+@bp.errorhandler(ProjectionError)
+def projection_error(error):
+    '''Answer requests with an invalid ``?fields=`` parameter with 400.'''
+    return respond({"error": str(error)}), 400
+
+
+@bp.errorhandler(OperationError)
+def operation_error(error):
+    '''Answer single-item creates and updates that cannot be applied.'''
+    return respond({"error": error.message}), error.status_code
+
+
+@bp.errorhandler(DuplicateError)
+def duplicate_error(error):
+    '''Answer creates and updates that violate a uniqueness constraint with 409.'''
+    return respond({"error": error.message, "id": error.existing_id}), 409
+
+
+def delta_response(section):
+    '''
+    Build the response to ``GET /resume/<section>?since=<version>``.
+
+    Returns:
+        flask.Response: JSON object with the current ``version``, the records
+                       ``changed`` since the requested version (with their ID
+                       and version, and ``?fields=`` applied) and the IDs
+                       ``deleted`` since then; 400 for a malformed version, or
+                       410 if deletions after it may have been forgotten and
+                       the client must resync fully
+    '''
+    project = get_projection(MODELS[section], from_dict=True)
+    try:
+        since = int(request.args["since"])
+    except ValueError:
+        return respond({"error": "since must be an integer version"}), 400
+
+    with get_lock():
+        version = current_app.extensions["resume_changes"].sequence
+        try:
+            changed, deleted = current_app.extensions["resume_versions"].since(section, since)
+        except SyncExpired:
+            return respond({"error": "Version too old, fetch the full collection",
+                            "version": version}), 410
+    if project:
+        changed = [
+            dict(project(record), id=record["id"], version=record["version"])
+            for record in changed
+        ]
+    return respond({"version": version, "changed": changed, "deleted": deleted}), 200
+
+
+# Declared for tools and readers; resolved lazily by ``__getattr__`` below.
+app: Flask
+
+_DEFAULT_APP = {}
+
+
+def __getattr__(name):
+    '''
+    Lazily build the module-level ``app`` on first access.
+
+    Keeps ``from app import app`` and ``flask run`` working without paying
+    for application setup at import time.
+    '''
+    if name == "app":
+        if "app" not in _DEFAULT_APP:
+            _DEFAULT_APP["app"] = create_app()
+        return _DEFAULT_APP["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@bp.route('/test')
 def hello_world():
     '''
     Test endpoint to verify API is running.
@@ -57,15 +296,15 @@ def hello_world():
         GET /test
         Response: {"message": "Hello, World!"}
     '''
-    return jsonify({"message": "Hello, World!"})
+    return respond({"message": "Hello, World!"})
 
-@app.route('/resume/experience/<int:idx>', methods=['GET'])
+@bp.route('/resume/experience/<int:idx>', methods=['GET'])
 def get_experience_by_id(idx):
     """
     Retrieve a specific experience entry by its ID.
     
     Args:
-        idx (int): The index/ID of the experience entry to retrieve
+        idx (int): The ID of the experience entry to retrieve
         
     Returns:
         flask.Response: JSON response containing the experience data if found,
@@ -76,17 +315,22 @@ def get_experience_by_id(idx):
         Success Response (200): {experience object}
         Error Response (404): {"error": "Experience not found"}
     """
-
-    if 0 <= idx < len(data["experience"]):
-        return jsonify(data["experience"][idx])
-    return jsonify({"error": "Experience not found"}), 404
-
-@app.route('/resume/experience', methods=['GET', 'POST'])
+    data = get_data()
+    project = get_projection(Experience)
+    position = find_position(data, "experience", idx)
+    if position is not None:
+        exp = data["experience"][position]
+        return respond(project(exp) if project else exp)
+    return respond({"error": "Experience not found"}), 404
+
+@bp.route('/resume/experience', methods=['GET', 'POST'])
 def experience():
     '''
     Handle GET and POST requests for experience entries.
     
     GET: Returns all experience entries as a list (excluding ID fields)
+    GET ?since=N: Returns the experience entries changed and deleted after version N
+    GET ?fields=a,b: Returns only the listed fields of each experience entry
     POST: Creates a new experience entry from JSON data
     
     Returns:
@@ -112,27 +356,35 @@ def experience():
         Request: {experience data}
         Response: {"id": 1}
     '''
+    data = get_data()
     if request.method == 'GET':
-        return jsonify([
+        if "since" in request.args:
+            return delta_response("experience")
+        project = get_projection(Experience)
+        if project:
+            return respond([project(exp) for exp in data["experience"]])
+        return respond([
             {k: v for k, v in exp.__dict__.items() if k != "id"}
             for exp in data["experience"]
         ])
 
     if request.method == 'POST':
-        exp_data = request.get_json()
-        new_id = len(data["experience"])
-        new_exp = Experience(id=new_id, **exp_data)
-        data["experience"].append(new_exp)
-        return jsonify({"id": new_id}), 201
+        exp_data = read_body()
+        with get_lock():
+            new_exp = create_record(data, "experience", exp_data, get_indexes())
+            publish_change("create", "experience", new_exp)
+        return respond({"id": new_exp.id}), 201
 
-    return jsonify({"error": "Method not allowed"}), 405
+    return respond({"error": "Method not allowed"}), 405
 
-@app.route('/resume/education', methods=['GET', 'POST'])
+@bp.route('/resume/education', methods=['GET', 'POST'])
 def education():
     '''
     Handle GET and POST requests for education entries.
     
     GET: Returns all education entries as a list (excluding ID fields)
+    GET ?since=N: Returns the education entries changed and deleted after version N
+    GET ?fields=a,b: Returns only the listed fields of each education entry
     POST: Creates a new education entry from JSON data
     
     Returns:
@@ -158,27 +410,35 @@ def education():
         Request: {education data}
         Response: {"id": 1}
     '''
+    data = get_data()
     if request.method == 'GET':
-        return jsonify([
+        if "since" in request.args:
+            return delta_response("education")
+        project = get_projection(Education)
+        if project:
+            return respond([project(edu) for edu in data["education"]])
+        return respond([
             {k: v for k, v in edu.__dict__.items() if k != "id"}
             for edu in data["education"]
         ])
 
     if request.method == 'POST':
-        edu_data = request.get_json()
-        new_id = len(data["education"])
-        new_edu = Education(id=new_id, **edu_data)
-        data["education"].append(new_edu)
-        return jsonify({"id": new_id}), 201
+        edu_data = read_body()
+        with get_lock():
+            new_edu = create_record(data, "education", edu_data, get_indexes())
+            publish_change("create", "education", new_edu)
+        return respond({"id": new_edu.id}), 201
 
-    return jsonify({"error": "Method not allowed"}), 405
+    return respond({"error": "Method not allowed"}), 405
 
-@app.route('/resume/skill', methods=['GET', 'POST'])
+@bp.route('/resume/skill', methods=['GET', 'POST'])
 def skill():
     '''
     Handle GET and POST requests for skill entries.
     
     GET: Returns all skill entries as a list (excluding ID fields)
+    GET ?since=N: Returns the skill entries changed and deleted after version N
+    GET ?fields=a,b: Returns only the listed fields of each skill entry
     POST: Creates a new skill entry from JSON data
     
     Returns:
@@ -201,22 +461,28 @@ def skill():
         Request: {skill data}
         Response: {"id": 1}
     '''
+    data = get_data()
     if request.method == 'GET':
-        return jsonify([
+        if "since" in request.args:
+            return delta_response("skill")
+        project = get_projection(Skill)
+        if project:
+            return respond([project(s) for s in data["skill"]])
+        return respond([
             {k: v for k, v in s.__dict__.items() if k != "id"}
             for s in data["skill"]
         ])
 
     if request.method == 'POST':
-        skill_data = request.get_json()
-        new_id = len(data["skill"])
-        new_skill = Skill(id=new_id, **skill_data)
-        data["skill"].append(new_skill)
-        return jsonify({"id": new_id}), 201
+        skill_data = read_body()
+        with get_lock():
+            new_skill = create_record(data, "skill", skill_data, get_indexes())
+            publish_change("create", "skill", new_skill)
+        return respond({"id": new_skill.id}), 201
 
-    return jsonify({"error": "Method not allowed"}), 405
+    return respond({"error": "Method not allowed"}), 405
 
-@app.route('/resume/education/<int:education_id>', methods=['GET'])
+@bp.route('/resume/education/<int:education_id>', methods=['GET'])
 def get_education_by_id(education_id):
     '''
     Retrieve a specific education entry by its ID.
@@ -233,43 +499,44 @@ def get_education_by_id(education_id):
         Success Response (200): {education object with ID}
         Error Response (404): {"error": "Education not found"}
     '''
+    data = get_data()
+    project = get_projection(Education)
     for edu in data["education"]:
         if edu.id == education_id:
-            return jsonify(edu.__dict__), 200
+            return respond(project(edu) if project else edu.__dict__), 200
 
-    return jsonify({"error": "Education not found"}), 404
+    return respond({"error": "Education not found"}), 404
 
-@app.route('/resume/skill/<int:skill_id>', methods=['GET'])
+@bp.route('/resume/skill/<int:skill_id>', methods=['GET'])
 def get_skill_by_id(skill_id):
     '''Returns one skill entry by ID.'''
+    data = get_data()
+    project = get_projection(Skill)
     for s in data["skill"]:
         if s.id == skill_id:
-            return jsonify(s.__dict__), 200
+            return respond(project(s) if project else s.__dict__), 200
 
-    return jsonify({"error": "Skill not found"}), 404
+    return respond({"error": "Skill not found"}), 404
 
-@app.route('/contact', methods=['GET', 'POST', 'PUT'])
+@bp.route('/contact', methods=['GET', 'POST', 'PUT'])
 def contact():
     '''Handles GET, POST, and PUT for contact information.'''
+    data = get_data()
     response_data = {}
     status_code = 200
 
     if request.method == 'GET':
         if data["contact"]:
-            response_data = {
-                "name": data["contact"].name,
-                "email": data["contact"].email,
-                "phone": data["contact"].phone,
-                "linkedin": data["contact"].linkedin,
-                "github": data["contact"].github
-            }
+            project = get_projection(Contact)
+            response_data = (project(data["contact"]) if project
+                             else dataclasses.asdict(data["contact"]))
         else:
             response_data = {"message": "No contact information found"}
             status_code = 404
 
     elif request.method in ['POST', 'PUT']:
         try:
-            contact_data = request.get_json()
+            contact_data = read_body()
             required_fields = ['name', 'email', 'phone', 'linkedin', 'github']
             missing_fields = [field for field in required_fields if field not in contact_data]
             if missing_fields:
@@ -290,7 +557,10 @@ def contact():
                     response_data = {"error": "Invalid phone format. (e.g., +1234567890)"}
                     status_code = 400
                 else:
-                    data["contact"] = new_contact
+                    with get_lock():
+                        op = "create" if data["contact"] is None else "update"
+                        data["contact"] = new_contact
+                        publish_change(op, "contact", new_contact)
                     response_data = {
                         "name": new_contact.name,
                         "email": new_contact.email,
@@ -310,25 +580,23 @@ def contact():
         response_data = {"error": "Method not allowed"}
         status_code = 405
 
-    return jsonify(response_data), status_code
+    return respond(response_data), status_code
 
-@app.route('/resume/education/<int:edu_id>', methods=['PUT'])
+@bp.route('/resume/education/<int:edu_id>', methods=['PUT'])
 def edit_education(edu_id):
-    '''Updates an existing education by its ID (index) with provided JSON data.'''
-    if 0 <= edu_id < len(data["education"]):
-        edu_data = request.json
-        edu = data["education"][edu_id]
-        edu.course = edu_data.get('course', edu.course)
-        edu.school = edu_data.get('school', edu.school)
-        edu.start_date = edu_data.get('start_date', edu.start_date)
-        edu.end_date = edu_data.get('end_date', edu.end_date)
-        edu.grade = edu_data.get('grade', edu.grade)
-        edu.logo = edu_data.get('logo', edu.logo)
-        return jsonify(edu.__dict__), 200
-    return jsonify({"error": "Education not found"}), 404
-
-#Update Exisitng Skill by Index
-@app.route('/resume/skill/<int:skill_id>', methods=['PUT'])
+    '''Updates an existing education by its ID with provided JSON data.'''
+    data = get_data()
+    edu_data = read_body()
+    with get_lock():
+        position = find_position(data, "education", edu_id)
+        if position is not None:
+            edu = update_record(data, "education", position, edu_data, get_indexes())
+            publish_change("update", "education", edu)
+            return respond(edu.__dict__), 200
+    return respond({"error": "Education not found"}), 404
+
+#Update Exisitng Skill by ID
+@bp.route('/resume/skill/<int:skill_id>', methods=['PUT'])
 def edit_skill(skill_id):
     """
     Update an existing skill entry by its ID.
@@ -352,47 +620,213 @@ def edit_skill(skill_id):
         Success Response (200): {updated skill object}
         Error Response (404): {"error": "Skill not found"}
     """
-    if 0 <= skill_id < len(data["skill"]):
-        skill_data = request.json
-        new_skill = data["skill"][skill_id]
-        new_skill.name = skill_data.get('name', new_skill.name)
-        new_skill.proficiency = skill_data.get('proficiency', new_skill.proficiency)
-        new_skill.logo = skill_data.get('logo', new_skill.logo)
-        return jsonify(new_skill.__dict__), 200
-
-    return jsonify({"error": "Skill not found"}), 404
-
-#Delete Existing Skill by Index
-@app.route('/resume/skill/<int:skill_id>', methods=['DELETE'])
+    data = get_data()
+    skill_data = read_body()
+    with get_lock():
+        position = find_position(data, "skill", skill_id)
+        if position is not None:
+            new_skill = update_record(data, "skill", position, skill_data, get_indexes())
+            publish_change("update", "skill", new_skill)
+            return respond(new_skill.__dict__), 200
+
+    return respond({"error": "Skill not found"}), 404
+
+#Delete Existing Skill by ID
+@bp.route('/resume/skill/<int:skill_id>', methods=['DELETE'])
 def delete_skill(skill_id):
-    """Deletes an existing skill by its ID (index)."""
-    if 0 <= skill_id < len(data["skill"]):
-        deleted_skill = data["skill"].pop(skill_id)
-        return jsonify(deleted_skill.__dict__), 200
+    """Deletes an existing skill by its ID."""
+    data = get_data()
+    with get_lock():
+        position = find_position(data, "skill", skill_id)
+        if position is not None:
+            deleted_skill = delete_record(data, "skill", position, get_indexes())
+            publish_change("delete", "skill", deleted_skill)
+            return respond(deleted_skill.__dict__), 200
 
-    return jsonify({"error": "Skill not found"}), 404
+    return respond({"error": "Skill not found"}), 404
 
 
-@app.route('/resume/education/<int:edu_id>', methods=['DELETE'])
+@bp.route('/resume/education/<int:edu_id>', methods=['DELETE'])
 def delete_education(edu_id):
     '''Deletes an education by its ID.'''
-    for edu in data["education"]:
-        if edu.id == edu_id:
-            data["education"].remove(edu)
-            return jsonify({"message": f"Education with id {edu_id} deleted."}), 200
-    return jsonify({"error": "Education not found"}), 404
-
-@app.route('/resume/experience/<int:exp_id>', methods=['PUT'])
+    data = get_data()
+    with get_lock():
+        position = find_position(data, "education", edu_id)
+        if position is not None:
+            deleted_edu = delete_record(data, "education", position, get_indexes())
+            publish_change("delete", "education", deleted_edu)
+            return respond({"message": f"Education with id {edu_id} deleted."}), 200
+    return respond({"error": "Education not found"}), 404
+
+@bp.route('/resume/experience/<int:exp_id>', methods=['PUT'])
 def edit_experience(exp_id):
-    '''Updates an existing experience by its ID (index) with provided JSON data.'''
-    if 0 <= exp_id < len(data["experience"]):
-        exp_data = request.json
-        exp = data["experience"][exp_id]
-        exp.title = exp_data.get('title', exp.title)
-        exp.company = exp_data.get('company', exp.company)
-        exp.start_date = exp_data.get('start_date', exp.start_date)
-        exp.end_date = exp_data.get('end_date', exp.end_date)
-        exp.description = exp_data.get('description', exp.description)
-        exp.logo = exp_data.get('logo', exp.logo)
-        return jsonify(exp.__dict__), 200
-    return jsonify({"error": "Experience not found"}), 404
+    '''Updates an existing experience by its ID with provided JSON data.'''
+    data = get_data()
+    exp_data = read_body()
+    with get_lock():
+        position = find_position(data, "experience", exp_id)
+        if position is not None:
+            exp = update_record(data, "experience", position, exp_data, get_indexes())
+            publish_change("update", "experience", exp)
+            return respond(exp.__dict__), 200
+    return respond({"error": "Experience not found"}), 404
+
+
+@bp.route('/resume/batch', methods=['POST'])
+def batch():
+    '''
+    Apply several create, update and delete operations all-or-nothing.
+
+    Operations are applied in order under the write lock. If one fails, every
+    operation already applied is rolled back and nothing is changed.
+
+    Request Body:
+        JSON object containing:
+            - operations (list): Operation objects with
+                - op (str): "create", "update" or "delete"
+                - section (str): "experience", "education" or "skill"
+                - id (int): Record ID (update and delete only)
+                - data (dict): Field values (create and update only)
+
+    Returns:
+        flask.Response: JSON object with one result per operation and status 200,
+                       or the error of the failing operation (400 or 404)
+
+    Example:
+        POST /resume/batch
+        Request: {"operations": [
+            {"op": "create", "section": "skill", "data": {skill data}},
+            {"op": "update", "section": "experience", "id": 0, "data": {"title": "Lead"}},
+            {"op": "delete", "section": "education", "id": 0}
+        ]}
+        Success Response (200): {"results": [
+            {"status": 201, "id": 1},
+            {"status": 200, "record": {experience object}},
+            {"status": 200, "record": {education object}}
+        ]}
+        Error Response (404): {"error": "Education not found", "operation": 2}
+    '''
+    data = get_data()
+    body = read_body(silent=True)
+    operations = body.get("operations") if isinstance(body, dict) else None
+    if not isinstance(operations, list):
+        return respond({"error": "Request body must contain a list of operations"}), 400
+
+    with get_lock():
+        try:
+            results, changes = apply_batch(data, operations, get_indexes())
+        except OperationError as e:
+            return respond({"error": e.message, "operation": e.index}), e.status_code
+        for op, section, record in changes:
+            publish_change(op, section, record)
+    return respond({"results": results}), 200
+
+
+@bp.route('/resume/changes', methods=['GET'])
+def change_feed():
+    '''
+    Stream every create, update and delete as server-sent events.
+
+    Each event carries its sequence number as the SSE ``id``. Reconnecting
+    clients send it back as ``Last-Event-ID`` (or ``?last_event_id=``) and
+    receive every change after it that is still buffered; if some were
+    dropped, a ``reset`` event tells them to reload the full collections.
+    Without a last event ID the stream starts with the next change.
+
+    Streams hold a worker thread while open, so at most ``CHANGES_MAX_STREAMS``
+    are served at once; further clients get 503 with ``Retry-After``.
+
+    Returns:
+        flask.Response: ``text/event-stream`` of ``change`` events
+
+    Example:
+        GET /resume/changes
+        Last-Event-ID: 41
+
+        id: 42
+        event: change
+        data: {"seq": 42, "op": "update", "section": "skill", "id": 0,
+               "record": {skill object}}
+    '''
+    feed = current_app.extensions["resume_changes"]
+    last_event_id = request.headers.get("Last-Event-ID",
+                                        request.args.get("last_event_id"))
+    try:
+        last_seq = int(last_event_id) if last_event_id is not None else feed.sequence
+    except ValueError:
+        return respond({"error": "Invalid Last-Event-ID"}), 400
+
+    slots = current_app.extensions["resume_streams"]
+    if slots is not None and not slots.acquire(blocking=False):
+        response = respond({"error": "Too many open change streams"})
+        response.headers["Retry-After"] = str(current_app.config["SHED_RETRY_AFTER"])
+        return response, 503
+
+    stream = stream_changes(feed, last_seq, current_app.config["CHANGES_HEARTBEAT"])
+    response = Response(stream, mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    if slots is not None:
+        response.call_on_close(slots.release)
+    return response
+
+
+@bp.route('/resume/render', methods=['GET'])
+def render():
+    '''
+    Render the contact, experience, education and skill sections as one document.
+
+    Section fragments are cached by data version, so only sections changed
+    since the last render are rendered again.
+
+    Query Parameters:
+        format (str, optional): "html" (default) or "markdown"
+
+    Returns:
+        flask.Response: The rendered resume, or error message with status 400
+                       for an unknown format
+
+    Example:
+        GET /resume/render?format=markdown
+        Response (200, text/markdown): "## Experience ..."
+    '''
+    fmt = request.args.get("format", "html")
+    if fmt not in FORMATS:
+        return respond({"error": f"Unknown format: {fmt}"}), 400
+
+    versions = current_app.extensions["resume_versions"]
+    with get_lock():
+        document = render_resume(fmt, get_data(), versions.version_of,
+                                 current_app.extensions["resume_fragments"])
+    return Response(document, mimetype=FORMATS[fmt])
+
+
+@bp.route('/resume/stats', methods=['GET'])
+def stats():
+    '''
+    Return counts and breakdowns of the resume sections.
+
+    Served from aggregates that every create, update and delete keeps up to
+    date, so the cost does not depend on the size of the collections.
+    Ongoing positions (end date "Present") count up to today; experiences
+    whose dates cannot be parsed are counted in ``unparsed_dates``.
+
+    Returns:
+        flask.Response: JSON object with status 200
+
+    Example:
+        GET /resume/stats
+        Response: {
+            "experience": {"count": 1, "by_company": {"A Cool Company": 1},
+                           "total_years": 4.0, "unparsed_dates": 0},
+            "education": {"count": 1, "by_school": {"University of Tech": 1}},
+            "skill": {"count": 1, "by_proficiency": {"1-2 Years": 1}}
+        }
+    '''
+    with get_lock():
+        return respond(current_app.extensions["resume_stats"].snapshot())
+
+
+
+if __name__ == "__main__":
+    import serve
+    serve.main(create_app)
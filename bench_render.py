@@ -0,0 +1,67 @@
+'''
+Benchmark of GET /resume/render: cold renders versus fragment-cache hits.
+
+Usage:
+    python bench_render.py [number of records per section]
+'''
+import sys
+import timeit
+
+from app import create_app
+from models import Education, Experience, Skill
+
+
+def build_data(size):
+    '''Build a data store with ``size`` records in every section.'''
+    return {
+        "experience": [
+            Experience(id=i, title=f"Engineer {i}", company=f"Company {i}",
+                       start_date="January 2020", end_date="Present",
+                       description="Building things " * 20, logo="logo.png")
+            for i in range(size)
+        ],
+        "education": [
+            Education(id=i, course=f"Course {i}", school=f"School {i}",
+                      start_date="September 2015", end_date="June 2019",
+                      grade="90%", logo="logo.png")
+            for i in range(size)
+        ],
+        "skill": [
+            Skill(id=i, name=f"Skill {i}", proficiency="3 years", logo="logo.png")
+            for i in range(size)
+        ],
+        "contact": None
+    }
+
+
+def main():
+    '''Print cold and warm render times per format.'''
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    test_app = create_app({"RATELIMIT_ENABLED": False}, data=build_data(size))
+    client = test_app.test_client()
+    cache = test_app.extensions["resume_fragments"]
+    runs = 200
+
+    for fmt in ("html", "markdown"):
+        url = f"/resume/render?format={fmt}"
+
+        def cold(url=url):
+            # Touch every section so that each render misses the cache
+            for section in ("experience", "education", "skill"):
+                client.put(f"/resume/{section}/0", json={})
+            client.get(url)
+
+        def touch_only():
+            for section in ("experience", "education", "skill"):
+                client.put(f"/resume/{section}/0", json={})
+
+        cold_time = (timeit.timeit(cold, number=runs)
+                     - timeit.timeit(touch_only, number=runs)) / runs
+        warm_time = timeit.timeit(lambda url=url: client.get(url), number=runs) / runs
+        print(f"{fmt:8} records/section={size}  cold={cold_time * 1000:.3f} ms  "
+              f"warm={warm_time * 1000:.3f} ms  speedup={cold_time / warm_time:.1f}x")
+    print(f"fragment cache: hits={cache.hits} misses={cache.misses}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+'''
+Benchmark of the wire formats: payload size and encode/decode time of a large
+experience list as JSON (``jsonify``), MessagePack and CBOR.
+
+Usage:
+    python bench_wire.py [number of records]
+'''
+import json
+import sys
+import timeit
+
+from app import create_app
+from bench_render import build_data
+from wire import CODECS
+
+
+def main():
+    '''Print size, encode and decode time per format.'''
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    test_app = create_app({"RATELIMIT_ENABLED": False}, data=build_data(size))
+    client = test_app.test_client()
+    runs = 50
+
+    for mimetype in ("application/json", *CODECS):
+        if mimetype == "application/x-msgpack":
+            continue
+        headers = {"Accept": mimetype}
+        body = client.get("/resume/experience", headers=headers).data
+        decode = json.loads if mimetype == "application/json" else CODECS[mimetype][1]
+
+        encode_time = timeit.timeit(
+            lambda headers=headers: client.get("/resume/experience", headers=headers),
+            number=runs) / runs
+        decode_time = timeit.timeit(lambda body=body, decode=decode: decode(body),
+                                    number=runs) / runs
+        print(f"{mimetype:22} records={size}  size={len(body):>8} B  "
+              f"GET={encode_time * 1000:.2f} ms  decode={decode_time * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
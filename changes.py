@@ -0,0 +1,107 @@
+'''
+Change feed for the Resume API.
+
+Every create, update and delete is published to a ``ChangeFeed`` with a
+monotonically increasing sequence number. The most recent changes are kept in
+a bounded ring buffer so that clients can resume a stream from the last
+sequence number they saw.
+'''
+import itertools
+import json
+import threading
+from collections import deque
+
+RETRY_MS = 3000
+
+
+class ChangeFeed:
+    '''Bounded, sequence-numbered log of changes that readers can wait on.'''
+
+    def __init__(self, capacity):
+        self._events = deque(maxlen=capacity)
+        self._condition = threading.Condition()
+        self.sequence = 0
+
+    def publish(self, op, section, record_id, record):
+        '''
+        Append a change and wake up waiting readers.
+
+        Args:
+            op (str): "create", "update" or "delete"
+            section (str): Section the record belongs to
+            record_id (int): ID of the record, or None for the contact
+            record (dict): The record after the change (before it, for deletes)
+
+        Returns:
+            dict: The published event, including its ``seq``
+        '''
+        with self._condition:
+            self.sequence += 1
+            event = {
+                "seq": self.sequence,
+                "op": op,
+                "section": section,
+                "id": record_id,
+                "record": record
+            }
+            self._events.append(event)
+            self._condition.notify_all()
+        return event
+
+    def since(self, seq):
+        '''
+        Return the changes published after ``seq``.
+
+        Returns:
+            tuple: (events, complete) where ``complete`` is False if changes
+                   after ``seq`` have already been dropped from the buffer
+        '''
+        with self._condition:
+            return self._since(seq)
+
+    def wait(self, seq, timeout):
+        '''Like ``since``, but block up to ``timeout`` seconds for a new change.'''
+        with self._condition:
+            self._condition.wait_for(lambda: self.sequence != seq, timeout)
+            return self._since(seq)
+
+    def _since(self, seq):
+        if seq > self.sequence:
+            return [], False
+        oldest = self._events[0]["seq"] if self._events else self.sequence + 1
+        if seq + 1 < oldest:
+            return list(self._events), False
+        return list(itertools.islice(self._events, seq + 1 - oldest, None)), True
+
+
+def format_event(event):
+    '''Format a change as a server-sent event.'''
+    return f"id: {event['seq']}\nevent: change\ndata: {json.dumps(event)}\n\n"
+
+
+def stream_changes(feed, last_seq, heartbeat):
+    '''
+    Generate server-sent events for the changes after ``last_seq``, forever.
+
+    If changes after ``last_seq`` are no longer buffered (or ``last_seq`` is
+    from the future, e.g. after a restart), a ``reset`` event tells the client
+    to reload the full collections before applying further changes.
+
+    Args:
+        feed (ChangeFeed): Feed to stream
+        last_seq (int): Last sequence number the client has seen
+        heartbeat (float): Seconds between keep-alive comments when idle
+    '''
+    yield f"retry: {RETRY_MS}\n\n"
+    events, complete = feed.since(last_seq)
+    while True:
+        if not complete:
+            last_seq = feed.sequence
+            events = []
+            yield f"id: {last_seq}\nevent: reset\ndata: {json.dumps({'seq': last_seq})}\n\n"
+        for event in events:
+            last_seq = event["seq"]
+            yield format_event(event)
+        events, complete = feed.wait(last_seq, heartbeat)
+        if complete and not events:
+            yield ": keep-alive\n\n"
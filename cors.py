@@ -0,0 +1,113 @@
+# pylint: disable=R0902
+'''
+CORS handling for the Resume API.
+
+Browser preflights (``OPTIONS`` with ``Access-Control-Request-Method``) for
+the resume and contact routes are answered by a WSGI layer in front of Flask,
+from header sets computed once per route. Preflights for other routes reach
+Flask's automatic ``OPTIONS`` response and get the same headers added there.
+Other responses get their CORS headers from a dict lookup on the request's
+``Origin``.
+'''
+from flask import request
+
+
+class Cors:
+    '''
+    Fast-path CORS for an app.
+
+    Configuration (read from ``app.config``):
+        CORS_ORIGINS (str or list): "*" or the origins allowed to call the API
+        CORS_MAX_AGE (int): Seconds browsers may cache a preflight response
+        CORS_PREFLIGHT_PATHS (tuple): Path prefixes whose preflights are short-circuited
+                                      (preflights elsewhere are answered by Flask)
+    '''
+
+    max_cached_paths = 1024
+
+    def __init__(self, config):
+        origins = config["CORS_ORIGINS"]
+        self.wildcard = origins == "*"
+        self.origins = frozenset() if self.wildcard else frozenset(origins)
+        self.max_age = str(config["CORS_MAX_AGE"])
+        self.paths = tuple(config["CORS_PREFLIGHT_PATHS"])
+        # path -> preflight headers (None if no route matches the path)
+        self._preflights = {}
+        # "GET, POST, ..." -> shared preflight headers
+        self._header_sets = {}
+        self._url_map = None
+        self._wsgi_app = None
+
+    def init_app(self, app):
+        '''Put the preflight layer in front of ``app`` and decorate its responses.'''
+        app.extensions["resume_cors"] = self
+        self._url_map = app.url_map
+        self._wsgi_app = app.wsgi_app
+        app.wsgi_app = self
+        app.after_request(self.decorate)
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO", "")
+        if (environ["REQUEST_METHOD"] == "OPTIONS"
+                and "HTTP_ACCESS_CONTROL_REQUEST_METHOD" in environ
+                and path.startswith(self.paths)):
+            origin = environ.get("HTTP_ORIGIN")
+            headers = self._preflight_headers(path)
+            if headers is not None and (self.wildcard or origin in self.origins):
+                headers = list(headers)
+                headers.append(("Access-Control-Allow-Origin", "*" if self.wildcard else origin))
+                requested = environ.get("HTTP_ACCESS_CONTROL_REQUEST_HEADERS")
+                if requested:
+                    headers.append(("Access-Control-Allow-Headers", requested))
+                start_response("204 No Content", headers)
+                return [b""]
+        return self._wsgi_app(environ, start_response)
+
+    def _preflight_headers(self, path):
+        '''Return the cached preflight headers for ``path``, computing them on a miss.'''
+        try:
+            return self._preflights[path]
+        except KeyError:
+            pass
+        methods = self._url_map.bind("localhost").allowed_methods(path)
+        headers = None
+        if methods:
+            allowed = ", ".join(sorted(methods))
+            headers = self._header_sets.get(allowed)
+            if headers is None:
+                headers = (
+                    ("Access-Control-Allow-Methods", allowed),
+                    ("Access-Control-Max-Age", self.max_age),
+                    ("Vary", "Origin, Access-Control-Request-Headers"),
+                    ("Content-Length", "0"),
+                )
+                self._header_sets[allowed] = headers
+        if len(self._preflights) >= self.max_cached_paths:
+            self._preflights.clear()
+        self._preflights[path] = headers
+        return headers
+
+    def decorate(self, response):
+        '''Add CORS headers to a response of the current request.'''
+        if self.wildcard:
+            response.headers["Access-Control-Allow-Origin"] = "*"
+        else:
+            origin = request.headers.get("Origin")
+            response.vary.add("Origin")
+            if origin not in self.origins:
+                return response
+            response.headers["Access-Control-Allow-Origin"] = origin
+        if request.method == "OPTIONS" and "Access-Control-Request-Method" in request.headers:
+            self._decorate_preflight(response)
+        return response
+
+    def _decorate_preflight(self, response):
+        '''Add preflight headers to Flask's answer to a preflight outside ``paths``.'''
+        if not response.allow:
+            return
+        response.headers["Access-Control-Allow-Methods"] = ", ".join(sorted(response.allow))
+        response.headers["Access-Control-Max-Age"] = self.max_age
+        requested = request.headers.get("Access-Control-Request-Headers")
+        if requested:
+            response.headers["Access-Control-Allow-Headers"] = requested
+        response.vary.add("Access-Control-Request-Headers")
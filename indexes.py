@@ -0,0 +1,95 @@
+'''
+Uniqueness constraints for the Resume API.
+
+A constraint names the fields whose combined values must be unique within a
+section, e.g. ``{"skill": ("name",)}``. Each constraint is enforced by a hash
+index from field values to record, kept up to date by every create, update
+and delete, so duplicates are detected in O(1).
+'''
+import operator
+
+from store import OperationError
+
+
+class DuplicateError(OperationError):
+    '''A create or update that would violate a uniqueness constraint.'''
+
+    def __init__(self, section, fields, existing):
+        values = ", ".join(f"{name}={getattr(existing, name)!r}" for name in fields)
+        super().__init__(f"Duplicate {section}: {values} already exists", 409)
+        self.existing_id = existing.id
+
+
+class UniqueIndexes:
+    '''
+    Hash indexes enforcing the uniqueness constraints of every section.
+
+    Args:
+        constraints (dict): Section -> tuple of field names that must be unique
+        data (dict): The data store to index
+
+    Raises:
+        DuplicateError: If ``data`` already violates a constraint
+    '''
+
+    def __init__(self, constraints, data):
+        self.fields = {section: tuple(fields) for section, fields in constraints.items()}
+        self._keys = {section: operator.attrgetter(*fields)
+                      for section, fields in self.fields.items()}
+        self._index = {section: {} for section in self.fields}
+        for section in self.fields:
+            for record in data[section]:
+                self.add(section, record)
+
+    def _key(self, section, record):
+        '''
+        Return the index key of ``record``.
+
+        Raises:
+            OperationError: With status 400 if a unique field holds a list or
+                            object, which cannot be used as a key
+        '''
+        key = self._keys[section](record)
+        try:
+            hash(key)
+        except TypeError as e:
+            fields = ", ".join(self.fields[section])
+            raise OperationError(
+                f"Invalid {section} data: unique field(s) {fields} must not be "
+                "lists or objects") from e
+        return key
+
+    def add(self, section, record):
+        '''Index a new ``record``; raises DuplicateError if its key is taken.'''
+        if section not in self._index:
+            return
+        key = self._key(section, record)
+        existing = self._index[section].get(key)
+        if existing is not None:
+            raise DuplicateError(section, self.fields[section], existing)
+        self._index[section][key] = record
+
+    def update(self, section, record, candidate):
+        '''
+        Re-index ``record`` for the values of ``candidate`` before it is updated.
+
+        Raises:
+            DuplicateError: If another record already has ``candidate``'s key
+            OperationError: If ``candidate``'s key is not hashable
+        '''
+        if section not in self._index:
+            return
+        old_key = self._keys[section](record)
+        new_key = self._key(section, candidate)
+        if new_key == old_key:
+            return
+        existing = self._index[section].get(new_key)
+        if existing is not None:
+            raise DuplicateError(section, self.fields[section], existing)
+        del self._index[section][old_key]
+        self._index[section][new_key] = record
+
+    def remove(self, section, record):
+        '''Drop a deleted ``record`` from the index.'''
+        if section in self._index:
+            self._index[section].pop(self._keys[section](record), None)
@@ -0,0 +1,44 @@
+'''
+Sparse fieldsets for the Resume API.
+
+``?fields=title,company`` limits a response to the listed fields. Each
+distinct projection is compiled once into a serializer and cached.
+'''
+import dataclasses
+import functools
+import operator
+
+
+class ProjectionError(ValueError):
+    '''A ``fields`` parameter that names fields the model does not have.'''
+
+
+@functools.lru_cache(maxsize=256)
+def compile_projection(model, spec, from_dict=False):
+    '''
+    Compile a ``fields`` specification into a serializer.
+
+    Args:
+        model (type): Model dataclass the records belong to
+        spec (str): Comma-separated field names, e.g. "title,company"
+        from_dict (bool): Serialize dicts instead of model objects
+
+    Returns:
+        callable: Takes a record and returns a dict with only the listed fields
+
+    Raises:
+        ProjectionError: If ``spec`` is empty or names unknown fields
+    '''
+    names = tuple(dict.fromkeys(name.strip() for name in spec.split(",") if name.strip()))
+    known = {field.name for field in dataclasses.fields(model)}
+    unknown = [name for name in names if name not in known]
+    if unknown:
+        raise ProjectionError(f"Unknown field(s): {', '.join(unknown)}")
+    if not names:
+        raise ProjectionError("fields must name at least one field")
+
+    getter = (operator.itemgetter if from_dict else operator.attrgetter)(*names)
+    if len(names) == 1:
+        name = names[0]
+        return lambda record: {name: getter(record)}
+    return lambda record: dict(zip(names, getter(record)))
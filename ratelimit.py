@@ -0,0 +1,181 @@
+# pylint: disable=R0902,R0903
+'''
+Admission control for the Resume API.
+
+Requests are rate limited with a token bucket per client and route (and,
+optionally, one shared by all clients of a route), and shed with a fast 503
+when too many requests are already in flight. Rejected requests carry a
+``Retry-After`` header instead of queueing until they time out.
+
+Clients are identified by ``request.remote_addr`` unless ``RATELIMIT_KEY_FUNC``
+is set. Behind a reverse proxy every request comes from the proxy's address,
+so set ``PROXY_FIX_X_FOR`` to the number of trusted proxies (which makes
+``remote_addr`` the real client from ``X-Forwarded-For``) or provide a key
+function; otherwise all clients share one bucket per route.
+'''
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g, request
+
+from wire import respond
+
+
+class TokenBucket:
+    '''Token bucket refilled continuously at ``rate`` tokens per second.'''
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def take(self, now):
+        '''
+        Try to take one token.
+
+        Args:
+            now (float): Current monotonic time in seconds
+
+        Returns:
+            float: 0 if a token was taken, otherwise the seconds until one is available
+        '''
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        if self.rate <= 0:
+            return math.inf
+        return (1 - self.tokens) / self.rate
+
+
+class BucketTable:
+    '''Bounded table of token buckets; the least recently used bucket is evicted.'''
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._buckets = OrderedDict()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def get(self, key, rate, capacity, now):
+        '''Return the bucket for ``key``, creating it (and evicting) as needed.'''
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(rate, capacity, now)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_size:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+
+class AdmissionController:
+    '''
+    Rate limiting and load shedding in front of every route of an app.
+
+    Configuration (read from ``app.config``):
+        RATELIMIT_RATE (float): Tokens per second for each client and route
+        RATELIMIT_BURST (int): Bucket capacity for each client and route
+        RATELIMIT_ROUTE_LIMITS (dict): Endpoint name -> (rate, burst) overrides
+        RATELIMIT_ROUTE_RATE (float): Tokens per second shared by all clients of
+                                      a route (None = no route-wide limit)
+        RATELIMIT_ROUTE_BURST (int): Capacity of the route-wide buckets
+        RATELIMIT_KEY_FUNC (callable): Returns the client key of the current
+                                       request (default: ``request.remote_addr``)
+        RATELIMIT_MAX_CLIENTS (int): Maximum number of buckets kept in memory
+        MAX_IN_FLIGHT (int): Requests served concurrently before shedding (0 = no limit)
+        MAX_IN_FLIGHT_EXEMPT (tuple): Endpoints of long-lived streams, which are
+                                      rate limited but not counted as in flight
+        SHED_RETRY_AFTER (int): ``Retry-After`` seconds sent with a 503
+    '''
+
+    def __init__(self, config, clock=time.monotonic):
+        self.rate = config["RATELIMIT_RATE"]
+        self.burst = config["RATELIMIT_BURST"]
+        self.route_limits = dict(config["RATELIMIT_ROUTE_LIMITS"])
+        self.route_rate = config["RATELIMIT_ROUTE_RATE"]
+        self.route_burst = config["RATELIMIT_ROUTE_BURST"] or self.route_rate
+        self.client_key = config["RATELIMIT_KEY_FUNC"] or _remote_addr
+        self.max_in_flight = config["MAX_IN_FLIGHT"]
+        self.in_flight_exempt = frozenset(config["MAX_IN_FLIGHT_EXEMPT"])
+        self.shed_retry_after = config["SHED_RETRY_AFTER"]
+        self.clock = clock
+        self.buckets = BucketTable(config["RATELIMIT_MAX_CLIENTS"])
+        # (method, endpoint) -> bucket shared by all clients; one per route, never evicted
+        self.route_buckets = {}
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        '''Install the admission hooks on ``app``.'''
+        app.extensions["resume_admission"] = self
+        app.before_request(self.admit)
+        app.teardown_request(self.release)
+
+    def admit(self):
+        '''
+        Admit the current request or reject it.
+
+        Returns:
+            None if the request is admitted, otherwise a 503 (overloaded) or
+            429 (rate limited) response with a ``Retry-After`` header
+        '''
+        endpoint = request.endpoint or "<unmatched>"
+        rate, burst = self.route_limits.get(endpoint, (self.rate, self.burst))
+        key = (self.client_key(), request.method, endpoint)
+        counted = endpoint not in self.in_flight_exempt
+
+        with self._lock:
+            if counted and self.max_in_flight and self.in_flight >= self.max_in_flight:
+                wait = None
+            else:
+                now = self.clock()
+                bucket = self.buckets.get(key, rate, burst, now)
+                wait = bucket.take(now)
+                if not wait and self.route_rate is not None:
+                    route_key = (request.method, endpoint)
+                    route_bucket = self.route_buckets.get(route_key)
+                    if route_bucket is None:
+                        route_bucket = TokenBucket(self.route_rate, self.route_burst, now)
+                        self.route_buckets[route_key] = route_bucket
+                    wait = route_bucket.take(now)
+                    if wait:
+                        # The route is saturated; give the client its token back
+                        bucket.tokens += 1
+                if not wait and counted:
+                    self.in_flight += 1
+
+        if wait is None:
+            return _reject({"error": "Server is overloaded"}, 503, self.shed_retry_after)
+        if wait:
+            return _reject({"error": "Too many requests"}, 429, wait)
+        g.resume_admitted = counted
+        return None
+
+    def release(self, _exc=None):
+        '''Mark the current request as finished.'''
+        if g.pop("resume_admitted", False):
+            with self._lock:
+                self.in_flight -= 1
+
+
+def _remote_addr():
+    '''Default client key: the address the request came from.'''
+    return request.remote_addr
+
+
+def _reject(body, status_code, retry_after):
+    '''Build a rejection response with a whole-second ``Retry-After`` header.'''
+    response = respond(body)
+    response.status_code = status_code
+    retry_after = 3600 if math.isinf(retry_after) else max(1, math.ceil(retry_after))
+    response.headers["Retry-After"] = str(retry_after)
+    return response
@@ -0,0 +1,184 @@
+# pylint: disable=R0903
+'''
+Server-side rendering of the resume as HTML or Markdown.
+
+Each section is rendered from a template that is compiled once per process.
+Rendered fragments are cached by the section's data version, so serving an
+unchanged resume only joins cached strings.
+'''
+import threading
+
+from jinja2 import Environment
+
+SECTIONS = ("contact", "experience", "education", "skill")
+
+FORMATS = {
+    "html": "text/html",
+    "markdown": "text/markdown",
+}
+
+# Text around the section fragments of a full document
+_DOCUMENTS = {
+    "html": (
+        "<!DOCTYPE html>\n<html>\n<head><meta charset=\"utf-8\"><title>Resume</title>"
+        "</head>\n<body>\n",
+        "</body>\n</html>\n"
+    ),
+    "markdown": ("", ""),
+}
+
+_TEMPLATES = {
+    "html": {
+        "contact": """{% if contact %}<header id="contact">
+<h1>{{ contact.name }}</h1>
+<ul>
+<li><a href="mailto:{{ contact.email }}">{{ contact.email }}</a></li>
+<li>{{ contact.phone }}</li>
+{% if contact.linkedin is web_url %}<li><a href="{{ contact.linkedin }}">LinkedIn</a></li>
+{% else %}<li>LinkedIn: {{ contact.linkedin }}</li>
+{% endif %}{% if contact.github is web_url %}<li><a href="{{ contact.github }}">GitHub</a></li>
+{% else %}<li>GitHub: {{ contact.github }}</li>
+{% endif %}</ul>
+</header>
+{% endif %}""",
+        "experience": """{% if items %}<section id="experience">
+<h2>Experience</h2>
+{% for item in items %}<article>
+<h3>{{ item.title }}, {{ item.company }}</h3>
+<p>{{ item.start_date }} - {{ item.end_date }}</p>
+<p>{{ item.description }}</p>
+</article>
+{% endfor %}</section>
+{% endif %}""",
+        "education": """{% if items %}<section id="education">
+<h2>Education</h2>
+{% for item in items %}<article>
+<h3>{{ item.course }}, {{ item.school }}</h3>
+<p>{{ item.start_date }} - {{ item.end_date }}</p>
+<p>Grade: {{ item.grade }}</p>
+</article>
+{% endfor %}</section>
+{% endif %}""",
+        "skill": """{% if items %}<section id="skill">
+<h2>Skills</h2>
+<ul>
+{% for item in items %}<li>{{ item.name }} ({{ item.proficiency }})</li>
+{% endfor %}</ul>
+</section>
+{% endif %}""",
+    },
+    "markdown": {
+        "contact": """{% if contact %}# {{ contact.name }}
+
+- Email: {{ contact.email }}
+- Phone: {{ contact.phone }}
+- LinkedIn: {{ contact.linkedin }}
+- GitHub: {{ contact.github }}
+
+{% endif %}""",
+        "experience": """{% if items %}## Experience
+
+{% for item in items %}### {{ item.title }}, {{ item.company }}
+
+*{{ item.start_date }} - {{ item.end_date }}*
+
+{{ item.description }}
+
+{% endfor %}{% endif %}""",
+        "education": """{% if items %}## Education
+
+{% for item in items %}### {{ item.course }}, {{ item.school }}
+
+*{{ item.start_date }} - {{ item.end_date }}*
+
+Grade: {{ item.grade }}
+
+{% endfor %}{% endif %}""",
+        "skill": """{% if items %}## Skills
+
+{% for item in items %}- {{ item.name }} ({{ item.proficiency }})
+{% endfor %}
+{% endif %}""",
+    },
+}
+
+
+def is_web_url(value):
+    '''Template test: only http(s) URLs may become links (no ``javascript:`` etc.).'''
+    return isinstance(value, str) and value.lower().startswith(("http://", "https://"))
+
+
+_compiled = {}
+_compile_lock = threading.Lock()
+
+
+def get_template(fmt, name):
+    '''Return the compiled template ``name`` for ``fmt``, compiling it on first use.'''
+    key = (fmt, name)
+    template = _compiled.get(key)
+    if template is None:
+        with _compile_lock:
+            template = _compiled.get(key)
+            if template is None:
+                environment = Environment(autoescape=fmt == "html", keep_trailing_newline=True)
+                environment.tests["web_url"] = is_web_url
+                template = environment.from_string(_TEMPLATES[fmt][name])
+                _compiled[key] = template
+    return template
+
+
+def render_section(fmt, section, data):
+    '''Render one section of ``data`` as ``fmt``.'''
+    if section == "contact":
+        return get_template(fmt, section).render(contact=data["contact"])
+    return get_template(fmt, section).render(items=data[section])
+
+
+class FragmentCache:
+    '''Rendered section fragments keyed by (format, section) and data version.'''
+
+    def __init__(self):
+        self._fragments = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, fmt, section, version, build):
+        '''
+        Return the cached fragment for ``version``, or build and cache it.
+
+        Args:
+            fmt (str): Output format
+            section (str): Section name
+            version (int): Current data version of the section
+            build (callable): Renders the fragment on a miss
+        '''
+        cached = self._fragments.get((fmt, section))
+        if cached is not None and cached[0] == version:
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        fragment = build()
+        self._fragments[(fmt, section)] = (version, fragment)
+        return fragment
+
+
+def render_resume(fmt, data, versions, cache):
+    '''
+    Render the whole resume.
+
+    Args:
+        fmt (str): One of ``FORMATS``
+        data (dict): The data store
+        versions (callable): Returns the data version of a section
+        cache (FragmentCache): Cache of rendered fragments
+
+    Returns:
+        str: The rendered document
+    '''
+    prefix, suffix = _DOCUMENTS[fmt]
+    fragments = [
+        cache.get(fmt, section, versions(section),
+                  lambda section=section: render_section(fmt, section, data))
+        for section in SECTIONS
+    ]
+    return "".join([prefix, *fragments, suffix])
@@ -0,0 +1,183 @@
+'''
+Production server for the Resume API.
+
+Runs the app under gunicorn with threaded workers:
+
+    python -m app serve [--port 8000] [--workers N] [--threads N] [--reuse-port]
+
+The thread count defaults to a value derived from the CPUs available to the
+process. Send SIGHUP for a graceful reload (new workers are started before
+old ones finish their requests) and SIGTERM for a graceful shutdown.
+
+Each ``/resume/changes`` stream holds a thread while it is open. At most
+``--max-streams`` are served per worker, always fewer than ``--threads``, and
+the default thread count reserves one thread per stream on top of the ones
+for ordinary requests.
+
+With ``--reuse-port`` every worker runs in its own server process with its
+own SO_REUSEPORT listening socket, so the kernel spreads new connections
+across processes instead of waking them all on a shared socket.
+
+The data store lives in process memory, so by default a single worker serves
+every request and is never recycled. More workers (``--workers``) and worker
+recycling (``--max-requests``) are opt-in: each worker process has its own
+copy of the data, change feed, uniqueness indexes and rate limits, and a
+recycled or reloaded worker starts again from the initial data.
+'''
+import argparse
+import functools
+import multiprocessing
+import os
+import signal
+
+
+def available_cpus():
+    '''Return the number of CPUs this process may run on.'''
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def build_parser():
+    '''Build the command line parser for ``python -m app``.'''
+    parser = argparse.ArgumentParser(prog="python -m app",
+                                     description="Resume API server")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser(
+        "serve", help="run the production server",
+        description="Run the Resume API under gunicorn. SIGHUP reloads the "
+                    "workers gracefully, which resets the in-memory data; "
+                    "SIGTERM shuts down gracefully.")
+    serve.add_argument("--host", default="0.0.0.0")
+    serve.add_argument("--port", type=int, default=8000)
+    serve.add_argument("--workers", type=int, default=1,
+                       help="worker processes (default: 1); each holds its own copy "
+                            "of the in-memory data, so writes are not shared")
+    serve.add_argument("--threads", type=int, default=None,
+                       help="threads per worker (default: 2 per CPU, between 2 and 8, "
+                            "plus one per change stream)")
+    serve.add_argument("--max-streams", type=int, default=4,
+                       help="concurrent /resume/changes streams per worker; always "
+                            "fewer than --threads so requests keep a thread")
+    serve.add_argument("--keepalive", type=int, default=5,
+                       help="seconds to keep idle client connections open")
+    serve.add_argument("--timeout", type=int, default=30,
+                       help="seconds before a silent worker is restarted")
+    serve.add_argument("--graceful-timeout", type=int, default=30,
+                       help="seconds workers get to finish requests on reload or shutdown")
+    serve.add_argument("--max-requests", type=int, default=0,
+                       help="requests after which a worker is recycled (default: 0 = "
+                            "never); recycling resets the worker's in-memory data")
+    serve.add_argument("--reuse-port", action="store_true",
+                       help="one server process per worker, each with its own "
+                            "SO_REUSEPORT socket")
+    return parser
+
+
+def build_options(args, cpus=None):
+    '''
+    Translate parsed arguments into gunicorn settings.
+
+    Args:
+        args (argparse.Namespace): Arguments of the ``serve`` command
+        cpus (int, optional): CPU count; detected when omitted
+
+    Returns:
+        dict: gunicorn settings
+    '''
+    cpus = cpus or available_cpus()
+    # Change streams hold a thread each; reserve them on top of the request threads
+    threads = args.threads or min(8, max(2, 2 * cpus)) + args.max_streams
+    return {
+        "bind": f"{args.host}:{args.port}",
+        "workers": args.workers,
+        "worker_class": "gthread",
+        "threads": threads,
+        "keepalive": args.keepalive,
+        "timeout": args.timeout,
+        "graceful_timeout": args.graceful_timeout,
+        "max_requests": args.max_requests,
+        "max_requests_jitter": args.max_requests // 10,
+        "reuse_port": args.reuse_port,
+    }
+
+
+def build_app_config(args, options):
+    '''
+    App settings matching the gunicorn settings.
+
+    Caps the number of change streams below the thread count, so that open
+    streams can never occupy every thread of a worker.
+    '''
+    return {"CHANGES_MAX_STREAMS": max(0, min(args.max_streams, options["threads"] - 1))}
+
+
+def run_gunicorn(options, factory):
+    '''Run gunicorn with ``options`` until it exits; each worker calls ``factory``.'''
+    # Imported here: gunicorn is only needed to serve, not to import the app.
+    from gunicorn.app.base import BaseApplication  # pylint: disable=import-outside-toplevel
+
+    class ResumeServer(BaseApplication):  # pylint: disable=abstract-method
+        '''gunicorn application that builds one app per worker.'''
+
+        def load_config(self):
+            for key, value in options.items():
+                # Skip settings this gunicorn version does not have
+                if key in self.cfg.settings:
+                    self.cfg.set(key, value)
+
+        def load(self):
+            return factory()
+
+    ResumeServer().run()
+
+
+def build_child_options(options):
+    '''
+    gunicorn settings for each server process of ``--reuse-port``.
+
+    Every child runs its own arbiter, so the control socket (one fixed path
+    per user by default) is disabled to keep the children from fighting over it.
+    '''
+    return dict(options, workers=1, reuse_port=True, control_socket_disable=True)
+
+
+def run_reuse_port(options, factory):
+    '''Run one single-worker gunicorn per worker, all bound with SO_REUSEPORT.'''
+    child_options = build_child_options(options)
+    children = [
+        multiprocessing.Process(target=run_gunicorn, args=(child_options, factory))
+        for _ in range(options["workers"])
+    ]
+    for child in children:
+        child.start()
+
+    def forward(signum, _frame):
+        for child in children:
+            if child.pid and child.is_alive():
+                os.kill(child.pid, signum)
+
+    signal.signal(signal.SIGHUP, forward)
+    signal.signal(signal.SIGTERM, forward)
+    # Ctrl-C already reaches every child through the process group; the parent
+    # ignores it (instead of forwarding a second one) and waits for them to exit
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for child in children:
+        child.join()
+
+
+def main(factory, argv=None):
+    '''
+    Entry point of ``python -m app``.
+
+    Args:
+        factory (callable): Builds the Flask app served by each worker
+        argv (list, optional): Command line arguments; defaults to ``sys.argv[1:]``
+    '''
+    args = build_parser().parse_args(argv)
+    options = build_options(args)
+    factory = functools.partial(factory, build_app_config(args, options))
+    if options["reuse_port"]:
+        run_reuse_port(options, factory)
+    else:
+        run_gunicorn(options, factory)
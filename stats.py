@@ -0,0 +1,155 @@
+# pylint: disable=R0902
+'''
+Resume statistics maintained incrementally from the change feed.
+
+Counts and breakdowns (skills by proficiency, experiences per company,
+education per school) and the total length of experience are updated with
+every create, update and delete, so reading them never scans a collection.
+'''
+import datetime
+import re
+from collections import Counter
+
+MONTHS = {
+    name: number
+    for number, names in enumerate([
+        ("january", "jan"), ("february", "feb"), ("march", "mar"), ("april", "apr"),
+        ("may",), ("june", "jun"), ("july", "jul"), ("august", "aug"),
+        ("september", "sep", "sept"), ("october", "oct"), ("november", "nov"),
+        ("december", "dec")
+    ])
+    for name in names
+}
+
+ONGOING = {"present", "current", "now", "ongoing"}
+
+# Group for records whose group field is not a string (e.g. a list or number)
+OTHER_GROUP = "(other)"
+
+# Field each section is broken down by
+GROUPS = {
+    "experience": "company",
+    "education": "school",
+    "skill": "proficiency",
+}
+
+
+def parse_month(text):
+    '''
+    Parse a date like "October 2022", "Oct 2022" or "2022" into a month number.
+
+    Returns:
+        int or None: Months since year 0 (year * 12 + month index), or None
+                     if the text is not a recognised date (or not a string)
+    '''
+    if not isinstance(text, str):
+        return None
+    match = re.fullmatch(r"\s*(?:([A-Za-z]+)\.?\s+)?(\d{4})\s*", text)
+    if not match:
+        return None
+    month_name, year = match.groups()
+    month = 0
+    if month_name:
+        month = MONTHS.get(month_name.lower())
+        if month is None:
+            return None
+    return int(year) * 12 + month
+
+
+def _experience_span(record):
+    '''
+    Return how an experience contributes to the total length of experience.
+
+    Returns:
+        tuple or None: ("closed", months), ("open", start month) for ongoing
+                       positions, or None if the dates cannot be parsed
+    '''
+    start = parse_month(record["start_date"])
+    if start is None:
+        return None
+    end_date = record["end_date"]
+    if isinstance(end_date, str) and end_date.strip().lower() in ONGOING:
+        return ("open", start)
+    end = parse_month(end_date)
+    if end is None:
+        return None
+    return ("closed", max(0, end - start))
+
+
+class ResumeStats:
+    '''
+    Materialized aggregates over the experience, education and skill sections.
+
+    Args:
+        today (callable): Returns the current date, used for ongoing positions
+    '''
+
+    def __init__(self, today=datetime.date.today):
+        self.today = today
+        self.groups = {section: Counter() for section in GROUPS}
+        self.counts = Counter()
+        # section -> record id -> (group value, experience span)
+        self._contributions = {section: {} for section in GROUPS}
+        self._closed_months = 0
+        self._open_count = 0
+        self._open_start_sum = 0
+        self._unparsed = 0
+
+    def record(self, event):
+        '''Apply a change feed event to the aggregates in O(1).'''
+        section = event["section"]
+        if section not in GROUPS:
+            return
+        contributions = self._contributions[section]
+        previous = contributions.pop(event["id"], None)
+        if previous is not None:
+            self._apply(section, previous, -1)
+        if event["op"] != "delete":
+            record = event["record"]
+            span = _experience_span(record) if section == "experience" else None
+            group = record[GROUPS[section]]
+            contribution = (group if isinstance(group, str) else OTHER_GROUP, span)
+            contributions[event["id"]] = contribution
+            self._apply(section, contribution, 1)
+
+    def _apply(self, section, contribution, sign):
+        '''Add (sign=1) or remove (sign=-1) one record's contribution.'''
+        group, span = contribution
+        self.counts[section] += sign
+        self.groups[section][group] += sign
+        if self.groups[section][group] == 0:
+            del self.groups[section][group]
+        if section != "experience":
+            return
+        if span is None:
+            self._unparsed += sign
+        elif span[0] == "closed":
+            self._closed_months += sign * span[1]
+        else:
+            self._open_count += sign
+            self._open_start_sum += sign * span[1]
+
+    def total_experience_months(self):
+        '''Total months of experience, counting ongoing positions up to today.'''
+        today = self.today()
+        now = today.year * 12 + today.month - 1
+        return self._closed_months + self._open_count * now - self._open_start_sum
+
+    def snapshot(self):
+        '''Return the current statistics as a JSON-compatible dict.'''
+        return {
+            "experience": {
+                "count": self.counts["experience"],
+                "by_company": dict(self.groups["experience"]),
+                "total_years": round(self.total_experience_months() / 12, 1),
+                "unparsed_dates": self._unparsed,
+            },
+            "education": {
+                "count": self.counts["education"],
+                "by_school": dict(self.groups["education"]),
+            },
+            "skill": {
+                "count": self.counts["skill"],
+                "by_proficiency": dict(self.groups["skill"]),
+            },
+        }
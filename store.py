@@ -0,0 +1,181 @@
+'''
+Mutations of the resume data store.
+
+Every create, update and delete on the ``experience``, ``education`` and
+``skill`` sections goes through the helpers in this module, both from the
+single-item routes and from the batch endpoint. Callers hold the app's write
+lock while mutating, and pass the app's uniqueness indexes (if any) so that
+they are kept up to date.
+'''
+import dataclasses
+
+from models import Experience, Education, Skill
+
+MODELS = {
+    "experience": Experience,
+    "education": Education,
+    "skill": Skill,
+}
+
+
+class OperationError(Exception):
+    '''A batch operation that cannot be applied.'''
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.index = None
+
+
+def create_record(data, section, fields, indexes=None):
+    '''
+    Append a new record to a section.
+
+    Args:
+        data (dict): The data store
+        section (str): One of ``MODELS``
+        fields (dict): Field values for the new record (without ``id``)
+        indexes (indexes.UniqueIndexes, optional): Uniqueness indexes to maintain
+
+    Returns:
+        The new model object
+
+    Raises:
+        TypeError: If ``fields`` does not match the model's fields
+        indexes.DuplicateError: If the record violates a uniqueness constraint
+    '''
+    records = data[section]
+    # Records are kept in ID order; never hand out the ID of a live record
+    new_id = records[-1].id + 1 if records else 0
+    record = MODELS[section](id=new_id, **fields)
+    if indexes:
+        indexes.add(section, record)
+    records.append(record)
+    return record
+
+
+def update_record(data, section, position, fields, indexes=None):
+    '''
+    Update the record at ``position``; fields missing from ``fields`` are kept.
+
+    Returns:
+        The updated model object
+
+    Raises:
+        indexes.DuplicateError: If the update violates a uniqueness constraint
+    '''
+    record = data[section][position]
+    values = {
+        field.name: fields.get(field.name, getattr(record, field.name))
+        for field in dataclasses.fields(record) if field.name != "id"
+    }
+    if indexes:
+        indexes.update(section, record, dataclasses.replace(record, **values))
+    for name, value in values.items():
+        setattr(record, name, value)
+    return record
+
+
+def delete_record(data, section, position, indexes=None):
+    '''Remove and return the record at ``position``.'''
+    record = data[section].pop(position)
+    if indexes:
+        indexes.remove(section, record)
+    return record
+
+
+def insert_record(data, section, position, record, indexes=None):
+    '''Put a deleted ``record`` back at ``position`` (undo of ``delete_record``).'''
+    if indexes:
+        indexes.add(section, record)
+    data[section].insert(position, record)
+
+
+def find_position(data, section, record_id):
+    '''Return the list position of the record with ``record_id``, or None.'''
+    for position, record in enumerate(data[section]):
+        if record.id == record_id:
+            return position
+    return None
+
+
+def apply_batch(data, operations, indexes=None):
+    '''
+    Apply a list of operations all-or-nothing.
+
+    Each operation is a dict with ``op`` (``create``, ``update`` or ``delete``),
+    ``section`` and, for updates and deletes, the ``id`` of the record. Creates
+    and updates take their field values from ``data``. If any operation fails,
+    the ones already applied are undone in reverse order.
+
+    Args:
+        data (dict): The data store
+        operations (list): Operations to apply, in order
+        indexes (indexes.UniqueIndexes, optional): Uniqueness indexes to maintain
+
+    Returns:
+        tuple: (results, changes) with one result dict per operation and one
+               (op, section, record) tuple per applied change, where
+               ``record`` is a copy of the record right after the change
+
+    Raises:
+        OperationError: With ``index`` set to the position of the failing operation;
+                        any other exception is re-raised after the rollback too
+    '''
+    undo = []
+    results = []
+    changes = []
+    try:
+        for index, operation in enumerate(operations):
+            try:
+                results.append(_apply_operation(data, operation, undo, changes, indexes))
+            except OperationError as error:
+                error.index = index
+                raise
+    except Exception:
+        for action in reversed(undo):
+            action()
+        raise
+    return results, changes
+
+
+def _apply_operation(data, operation, undo, changes, indexes):
+    '''Apply one batch operation, recording how to undo it in ``undo``.'''
+    if not isinstance(operation, dict):
+        raise OperationError("Operation must be an object")
+    op = operation.get("op")
+    section = operation.get("section")
+    fields = operation.get("data", {})
+    if section not in MODELS:
+        raise OperationError(f"Unknown section: {section}")
+    if not isinstance(fields, dict):
+        raise OperationError("Operation data must be an object")
+
+    if op == "create":
+        try:
+            record = create_record(data, section, fields, indexes)
+        except TypeError as e:
+            raise OperationError(f"Invalid {section} data: {str(e)}") from e
+        undo.append(lambda: delete_record(data, section, len(data[section]) - 1, indexes))
+        changes.append(("create", section, dataclasses.replace(record)))
+        return {"status": 201, "id": record.id}
+
+    if op not in ("update", "delete"):
+        raise OperationError(f"Unknown operation: {op}")
+
+    position = find_position(data, section, operation.get("id"))
+    if position is None:
+        raise OperationError(f"{section.capitalize()} not found", 404)
+
+    if op == "update":
+        previous = dataclasses.asdict(data[section][position])
+        record = update_record(data, section, position, fields, indexes)
+        undo.append(lambda: update_record(data, section, position, previous, indexes))
+        changes.append(("update", section, dataclasses.replace(record)))
+        return {"status": 200, "record": dataclasses.asdict(record)}
+
+    record = delete_record(data, section, position, indexes)
+    undo.append(lambda: insert_record(data, section, position, record, indexes))
+    changes.append(("delete", section, record))
+    return {"status": 200, "record": dataclasses.asdict(record)}
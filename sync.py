@@ -0,0 +1,118 @@
+'''
+Delta sync for the Resume API.
+
+Every record carries the version (change feed sequence number) of its last
+change. Deleted records leave a tombstone that expires after a while. Both are
+kept in version order, so the changes since a given version are found by
+walking back from the newest entry: O(changes), not O(collection).
+'''
+import time
+from collections import OrderedDict
+
+
+class SyncExpired(Exception):
+    '''The requested version is older than the oldest tombstone still kept.'''
+
+
+class SectionIndex:
+    '''Version-ordered index of the live records and tombstones of one section.'''
+
+    def __init__(self):
+        # record id -> (version, record dict), oldest version first
+        self.live = OrderedDict()
+        # record id -> (version, expires_at), oldest version first
+        self.tombstones = OrderedDict()
+        # Deletions at or before this version may have been forgotten
+        self.horizon = 0
+
+    def upsert(self, record_id, version, record):
+        '''Record that ``record_id`` was created or updated at ``version``.'''
+        self.live[record_id] = (version, record)
+        self.live.move_to_end(record_id)
+        self.tombstones.pop(record_id, None)
+
+    def remove(self, record_id, version, expires_at):
+        '''Replace ``record_id`` with a tombstone created at ``version``.'''
+        self.live.pop(record_id, None)
+        self.tombstones[record_id] = (version, expires_at)
+        self.tombstones.move_to_end(record_id)
+
+    def expire(self, now):
+        '''Drop tombstones that have expired, advancing the horizon.'''
+        while self.tombstones:
+            record_id, (version, expires_at) = next(iter(self.tombstones.items()))
+            if expires_at > now:
+                break
+            del self.tombstones[record_id]
+            self.horizon = max(self.horizon, version)
+
+    def since(self, version):
+        '''
+        Return the records changed and deleted after ``version``.
+
+        Returns:
+            tuple: (changed, deleted) with record dicts (including their
+                   ``version``) and deleted record IDs, oldest first
+
+        Raises:
+            SyncExpired: If deletions after ``version`` may have been forgotten
+        '''
+        if version < self.horizon:
+            raise SyncExpired(version)
+        changed = []
+        for _, (record_version, record) in _newer(self.live, version):
+            changed.append(dict(record, version=record_version))
+        deleted = [record_id for record_id, _ in _newer(self.tombstones, version)]
+        changed.reverse()
+        deleted.reverse()
+        return changed, deleted
+
+
+def _newer(entries, version):
+    '''Yield (key, value) entries with a version above ``version``, newest first.'''
+    for key in reversed(entries):
+        value = entries[key]
+        if value[0] <= version:
+            break
+        yield key, value
+
+
+class SyncIndex:
+    '''
+    Per-section version indexes, fed from the change feed.
+
+    Args:
+        sections (iterable): Names of the sections to index
+        tombstone_ttl (float): Seconds a tombstone is kept after a delete
+        clock (callable): Returns the current time in seconds
+    '''
+
+    def __init__(self, sections, tombstone_ttl, clock=time.monotonic):
+        self.sections = {section: SectionIndex() for section in sections}
+        # section -> version of its latest change, for every section seen
+        self.versions = {}
+        self.tombstone_ttl = tombstone_ttl
+        self.clock = clock
+
+    def record(self, event):
+        '''Apply a change feed event to the index of its section.'''
+        self.versions[event["section"]] = event["seq"]
+        index = self.sections.get(event["section"])
+        if index is None:
+            return
+        now = self.clock()
+        if event["op"] == "delete":
+            index.remove(event["id"], event["seq"], now + self.tombstone_ttl)
+        else:
+            index.upsert(event["id"], event["seq"], event["record"])
+        index.expire(now)
+
+    def version_of(self, section):
+        '''Return the version of the latest change to ``section`` (0 if none).'''
+        return self.versions.get(section, 0)
+
+    def since(self, section, version):
+        '''Return (changed, deleted) for ``section`` after ``version``; see SectionIndex.'''
+        index = self.sections[section]
+        index.expire(self.clock())
+        return index.since(version)
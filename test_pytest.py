@@ -1,8 +1,21 @@
+# pylint: disable=C0302
 '''
 Tests in Pytest
 '''
-from app import app
-from models import Contact
+import datetime
+import subprocess
+import sys
+
+import msgpack
+import pytest
+from flask import request
+
+from app import app, create_app
+from changes import ChangeFeed
+from models import Contact, Skill
+from ratelimit import BucketTable
+from serve import build_app_config, build_child_options, build_options, build_parser
+from stats import OTHER_GROUP, ResumeStats, parse_month
 
 
 def test_client():
@@ -473,3 +486,698 @@ def test_delete_education():
     get_all_response = app.test_client().get('/resume/education')
     educations = get_all_response.json
     assert example_education not in educations
+
+
+def test_single_item_routes_use_ids_after_delete():
+    '''Once IDs and list positions diverge, the item routes still address records by ID.'''
+    client = create_app().test_client()
+    go = {"name": "Go", "proficiency": "1 year", "logo": "go.png"}
+    assert client.post('/resume/skill', json=go).json == {"id": 1}
+    assert client.delete('/resume/skill/0').status_code == 200
+    assert client.post('/resume/skill', json=dict(go, name="Rust")).json == {"id": 2}
+
+    assert client.get('/resume/skill/2').json["name"] == "Rust"
+    assert client.put('/resume/skill/2', json={"proficiency": "2 years"}).json["id"] == 2
+    assert client.put('/resume/skill/0', json={"name": "Gone"}).status_code == 404
+    assert client.delete('/resume/skill/2').json["name"] == "Rust"
+    assert client.get('/resume/skill?fields=name').json == [{"name": "Go"}]
+
+    experience = client.get('/resume/experience/0').json
+    experience.pop("id")
+    assert client.post('/resume/experience', json=experience).json == {"id": 1}
+    assert client.post('/resume/batch', json={"operations": [
+        {"op": "delete", "section": "experience", "id": 0}
+    ]}).status_code == 200
+    assert client.get('/resume/experience/1').json["id"] == 1
+    assert client.get('/resume/experience/0').status_code == 404
+    assert client.put('/resume/experience/1', json={"title": "Lead"}).json["title"] == "Lead"
+
+    assert client.post('/resume/batch', json={"operations": [
+        {"op": "create", "section": "education",
+         "data": client.get('/resume/education?fields=course,school,start_date,'
+                            'end_date,grade,logo').json[0]},
+        {"op": "delete", "section": "education", "id": 0}
+    ]}).status_code == 200
+    assert client.put('/resume/education/1', json={"grade": "A"}).json["id"] == 1
+    assert client.put('/resume/education/0', json={"grade": "A"}).status_code == 404
+
+
+def test_create_app_isolated_instances():
+    '''Each app built by create_app has its own data store.'''
+    first = create_app().test_client()
+    second = create_app().test_client()
+
+    first.post('/resume/skill', json={
+        "name": "Rust",
+        "proficiency": "1 year",
+        "logo": "example-logo.png"
+    })
+
+    assert len(first.get('/resume/skill').json) == 2
+    assert len(second.get('/resume/skill').json) == 1
+
+
+def test_create_app_injected_data():
+    '''create_app serves the data store it is given.'''
+    store = {
+        "experience": [],
+        "education": [],
+        "skill": [Skill(id=0, name="Go", proficiency="3 years", logo="go.png")],
+        "contact": None
+    }
+    client = create_app({"TESTING": True}, data=store).test_client()
+
+    assert client.get('/resume/experience').json == []
+    assert client.get('/resume/skill/0').json["name"] == "Go"
+
+
+def test_import_is_lazy():
+    '''Importing the module does not build the default app.'''
+    code = "import app; print(bool(app._DEFAULT_APP))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True,
+                            text=True, check=True)
+    assert result.stdout.strip() == "False"
+
+
+def test_rate_limit_per_client_and_route():
+    '''Requests beyond the burst get a 429 with Retry-After, per client and route.'''
+    client = create_app({"RATELIMIT_RATE": 0.001, "RATELIMIT_BURST": 2}).test_client()
+
+    assert client.get('/resume/skill').status_code == 200
+    assert client.get('/resume/skill').status_code == 200
+    limited = client.get('/resume/skill')
+    assert limited.status_code == 429
+    assert int(limited.headers["Retry-After"]) >= 1
+
+    # Other routes and other clients have their own buckets
+    assert client.get('/resume/education').status_code == 200
+    other = client.get('/resume/skill', environ_base={"REMOTE_ADDR": "10.0.0.2"})
+    assert other.status_code == 200
+
+
+def test_load_shedding_when_saturated():
+    '''Requests are shed with a 503 once MAX_IN_FLIGHT requests are being served.'''
+    test_app = create_app({"MAX_IN_FLIGHT": 1})
+    client = test_app.test_client()
+    admission = test_app.extensions["resume_admission"]
+
+    assert client.get('/test').status_code == 200
+    assert admission.in_flight == 0
+
+    admission.in_flight = 1
+    response = client.get('/test')
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_bucket_table_evicts_least_recently_used():
+    '''The bucket table never grows beyond its size limit.'''
+    table = BucketTable(max_size=2)
+    table.get("a", 1, 1, 0.0).take(0.0)
+    table.get("b", 1, 1, 0.0).take(0.0)
+    table.get("a", 1, 1, 0.0)
+    table.get("c", 1, 1, 0.0)
+
+    assert len(table) == 2
+    # "a" was used most recently and keeps its state; "b" was evicted
+    assert table.get("a", 1, 1, 0.0).tokens == 0
+    assert table.get("b", 1, 1, 0.0).tokens == 1
+
+
+def test_batch_applies_all_operations():
+    '''POST /resume/batch applies creates, updates and deletes in one request.'''
+    client = create_app().test_client()
+    response = client.post('/resume/batch', json={"operations": [
+        {"op": "create", "section": "skill",
+         "data": {"name": "SQL", "proficiency": "3 years", "logo": "sql.png"}},
+        {"op": "update", "section": "experience", "id": 0, "data": {"title": "Lead"}},
+        {"op": "delete", "section": "education", "id": 0}
+    ]})
+    assert response.status_code == 200
+    results = response.json["results"]
+    assert results[0] == {"status": 201, "id": 1}
+    assert results[1]["record"]["title"] == "Lead"
+    assert results[2]["record"]["school"] == "University of Tech"
+
+    assert client.get('/resume/skill/1').json["name"] == "SQL"
+    assert client.get('/resume/experience/0').json["title"] == "Lead"
+    assert client.get('/resume/education').json == []
+
+
+def test_batch_is_all_or_nothing():
+    '''A failing operation rolls back every operation applied before it.'''
+    client = create_app().test_client()
+    before = {
+        section: client.get(f'/resume/{section}').json
+        for section in ("experience", "education", "skill")
+    }
+    response = client.post('/resume/batch', json={"operations": [
+        {"op": "create", "section": "skill",
+         "data": {"name": "SQL", "proficiency": "3 years", "logo": "sql.png"}},
+        {"op": "update", "section": "experience", "id": 0, "data": {"title": "Lead"}},
+        {"op": "delete", "section": "education", "id": 0},
+        {"op": "delete", "section": "skill", "id": 42}
+    ]})
+    assert response.status_code == 404
+    assert response.json == {"error": "Skill not found", "operation": 3}
+
+    for section, items in before.items():
+        assert client.get(f'/resume/{section}').json == items
+
+
+def test_batch_rolls_back_on_unexpected_errors(monkeypatch):
+    '''Operations are rolled back even if a later one fails with a non-operation error.'''
+    client = create_app().test_client()
+    before = client.get('/resume/skill').json
+
+    def broken_update(*_args):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr("store.update_record", broken_update)
+    response = client.post('/resume/batch', json={"operations": [
+        {"op": "create", "section": "skill",
+         "data": {"name": "Go", "proficiency": "1 year", "logo": "go.png"}},
+        {"op": "update", "section": "skill", "id": 0, "data": {"name": "Rust"}}
+    ]})
+    assert response.status_code == 500
+    assert client.get('/resume/skill').json == before
+    assert client.get('/resume/stats').json["skill"]["count"] == len(before)
+
+
+def test_batch_rejects_invalid_operations():
+    '''Malformed batches are rejected with 400.'''
+    client = create_app().test_client()
+    assert client.post('/resume/batch', json=[]).status_code == 400
+
+    response = client.post('/resume/batch', json={"operations": [
+        {"op": "create", "section": "skill", "data": {"name": "SQL"}}
+    ]})
+    assert response.status_code == 400
+    assert response.json["operation"] == 0
+
+
+def read_events(response, count):
+    '''Read ``count`` non-comment events from a streaming SSE response.'''
+    events = []
+    chunks = iter(response.response)
+    while len(events) < count:
+        chunk = next(chunks)
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if not chunk.startswith((":", "retry:")):
+            events.append(chunk)
+    response.close()
+    return events
+
+
+def test_change_feed_resumes_from_last_event_id():
+    '''GET /resume/changes replays changes after Last-Event-ID.'''
+    client = create_app().test_client()
+    client.post('/resume/skill', json={
+        "name": "Go", "proficiency": "1 year", "logo": "go.png"
+    })
+    client.put('/resume/skill/1', json={"proficiency": "2 years"})
+    client.delete('/resume/skill/0')
+
+    # Sequence numbers 1-3 are the seeded records
+    response = client.get('/resume/changes', headers={"Last-Event-ID": "4"},
+                          buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+
+    events = read_events(response, 2)
+    update, delete = events[0], events[1]
+    assert update.startswith("id: 5\nevent: change\n")
+    assert '"op": "update"' in update and '"2 years"' in update
+    assert delete.startswith("id: 6\n")
+    assert '"op": "delete"' in delete and '"Python"' in delete
+
+
+def test_change_feed_limits_open_streams():
+    '''Streams past CHANGES_MAX_STREAMS get 503 until an open one is closed.'''
+    client = create_app({"CHANGES_MAX_STREAMS": 1}).test_client()
+    stream = client.get('/resume/changes', buffered=False)
+    assert stream.status_code == 200
+
+    rejected = client.get('/resume/changes', buffered=False)
+    assert rejected.status_code == 503
+    assert rejected.headers["Retry-After"] == "1"
+    assert client.get('/test').status_code == 200
+
+    stream.close()
+    assert client.get('/resume/changes', buffered=False).status_code == 200
+
+
+def test_change_feed_resets_when_buffer_overflowed():
+    '''Clients that fell behind the ring buffer get a reset event.'''
+    feed = ChangeFeed(capacity=2)
+    for record_id in range(5):
+        feed.publish("create", "skill", record_id, {})
+
+    assert [e["seq"] for e in feed.since(3)[0]] == [4, 5]
+    assert feed.since(3)[1] is True
+    assert feed.since(1)[1] is False
+
+    client = create_app({"CHANGES_BUFFER_SIZE": 1}).test_client()
+    client.delete('/resume/skill/0')
+    client.delete('/resume/education/0')
+    response = client.get('/resume/changes?last_event_id=0', buffered=False)
+    assert read_events(response, 1)[0].startswith("id: 5\nevent: reset\n")
+
+
+def test_delta_sync_since_version():
+    '''GET /resume/<section>?since=N returns only changes and deletions after N.'''
+    client = create_app().test_client()
+    full = client.get('/resume/skill?since=0').json
+    assert [s["name"] for s in full["changed"]] == ["Python"]
+    assert full["deleted"] == []
+
+    new_id = client.post('/resume/skill', json={
+        "name": "Go", "proficiency": "1 year", "logo": "go.png"
+    }).json["id"]
+    client.delete('/resume/skill/0')
+    client.put('/resume/experience/0', json={"title": "Lead"})
+
+    delta = client.get(f'/resume/skill?since={full["version"]}').json
+    assert delta["version"] == full["version"] + 3
+    assert [(s["id"], s["name"]) for s in delta["changed"]] == [(new_id, "Go")]
+    assert delta["changed"][0]["version"] == full["version"] + 1
+    assert delta["deleted"] == [0]
+
+    assert client.get(f'/resume/skill?since={delta["version"]}').json["changed"] == []
+    assert client.get('/resume/skill?since=abc').status_code == 400
+
+
+def test_delta_sync_expired_tombstones():
+    '''Once tombstones expire, syncing from before them answers 410.'''
+    client = create_app({"TOMBSTONE_TTL": 0}).test_client()
+    client.delete('/resume/education/0')
+
+    response = client.get('/resume/education?since=0')
+    assert response.status_code == 410
+    assert client.get(f'/resume/education?since={response.json["version"]}').json == {
+        "version": response.json["version"], "changed": [], "deleted": []
+    }
+
+
+def test_render_html_and_markdown():
+    '''GET /resume/render renders every section in the requested format.'''
+    client = create_app().test_client()
+    client.post('/contact', json={
+        "name": "Jane <Smith>",
+        "email": "jane.smith@example.com",
+        "phone": "+19876543210",
+        "linkedin": "https://linkedin.com/in/janesmith",
+        "github": "https://github.com/janesmith"
+    })
+
+    html = client.get('/resume/render')
+    assert html.status_code == 200
+    assert html.mimetype == "text/html"
+    page = html.get_data(as_text=True)
+    assert "<h1>Jane &lt;Smith&gt;</h1>" in page
+    assert "<h3>Software Developer, A Cool Company</h3>" in page
+    assert "<li>Python (1-2 Years)</li>" in page
+
+    markdown = client.get('/resume/render?format=markdown')
+    assert markdown.mimetype == "text/markdown"
+    assert "## Education\n\n### Computer Science, University of Tech" in markdown.get_data(
+        as_text=True)
+
+    assert client.get('/resume/render?format=pdf').status_code == 400
+
+
+def test_render_reuses_unchanged_fragments():
+    '''Only sections changed since the last render are rendered again.'''
+    test_app = create_app()
+    client = test_app.test_client()
+    cache = test_app.extensions["resume_fragments"]
+
+    first = client.get('/resume/render').get_data(as_text=True)
+    assert (cache.hits, cache.misses) == (0, 4)
+    assert client.get('/resume/render').get_data(as_text=True) == first
+    assert (cache.hits, cache.misses) == (4, 4)
+
+    client.put('/resume/skill/0', json={"name": "Rust"})
+    assert "<li>Rust (1-2 Years)</li>" in client.get('/resume/render').get_data(as_text=True)
+    assert (cache.hits, cache.misses) == (7, 5)
+
+
+def test_msgpack_responses_and_bodies():
+    '''Routes speak MessagePack when asked to, and JSON by default.'''
+    client = create_app().test_client()
+    packed = {"Accept": "application/msgpack", "Content-Type": "application/msgpack"}
+    new_skill = {"name": "Elixir", "proficiency": "1 year", "logo": "elixir.png"}
+
+    response = client.post('/resume/skill', data=msgpack.packb(new_skill), headers=packed)
+    assert response.status_code == 201
+    assert response.mimetype == "application/msgpack"
+    new_id = msgpack.unpackb(response.data)["id"]
+
+    response = client.get(f'/resume/skill/{new_id}', headers=packed)
+    assert msgpack.unpackb(response.data) == dict(new_skill, id=new_id)
+    assert "Accept" in response.headers["Vary"]
+
+    response = client.get('/resume/experience/0', headers=packed)
+    assert msgpack.unpackb(response.data)["company"] == "A Cool Company"
+
+    assert client.get('/resume/skill').mimetype == "application/json"
+    bad = client.post('/resume/skill', data=b"\xc1", headers=packed)
+    assert bad.status_code == 400
+
+
+def test_cbor_responses_and_bodies():
+    '''Routes speak CBOR when asked to (if cbor2 is installed).'''
+    cbor2 = pytest.importorskip("cbor2")
+    client = create_app().test_client()
+    headers = {"Accept": "application/cbor", "Content-Type": "application/cbor"}
+
+    response = client.put('/resume/experience/0', data=cbor2.dumps({"title": "Lead"}),
+                          headers=headers)
+    assert response.mimetype == "application/cbor"
+    assert cbor2.loads(response.data)["title"] == "Lead"
+
+
+def test_binary_bodies_must_be_json_compatible():
+    '''MessagePack/CBOR bodies with values JSON cannot hold are rejected with 400.'''
+    client = create_app().test_client()
+    packed = {"Content-Type": "application/msgpack"}
+    skill = {"name": "Elixir", "proficiency": "1 year", "logo": "elixir.png"}
+    for body in (dict(skill, logo=b"\x89PNG"), dict(skill, proficiency={1: "year"}),
+                 dict(skill, name=msgpack.ExtType(1, b"x"))):
+        response = client.post('/resume/skill', data=msgpack.packb(body), headers=packed)
+        assert response.status_code == 400
+    response = client.post('/resume/batch', headers=packed, data=msgpack.packb(
+        {"operations": [{"op": "create", "section": "skill", "data": dict(skill, logo=b"")}]}))
+    assert response.status_code == 400
+
+    cbor2 = pytest.importorskip("cbor2")
+    response = client.post('/resume/skill', headers={"Content-Type": "application/cbor"},
+                           data=cbor2.dumps(dict(skill, name=cbor2.CBORTag(4000, "x"))))
+    assert response.status_code == 400
+
+    assert client.get('/resume/skill').json == [
+        {"name": "Python", "proficiency": "1-2 Years", "logo": "example-logo.png"}]
+
+
+def test_cors_preflight_short_circuit():
+    '''Preflights are answered before dispatch, with cached headers and Max-Age.'''
+    client = create_app({"CORS_MAX_AGE": 600}).test_client()
+    preflight = {
+        "Origin": "https://example.com",
+        "Access-Control-Request-Method": "PUT",
+        "Access-Control-Request-Headers": "content-type"
+    }
+
+    response = client.options('/resume/skill/0', headers=preflight)
+    assert response.status_code == 204
+    assert response.headers["Access-Control-Allow-Origin"] == "*"
+    assert response.headers["Access-Control-Allow-Headers"] == "content-type"
+    assert response.headers["Access-Control-Max-Age"] == "600"
+    assert set(response.headers["Access-Control-Allow-Methods"].split(", ")) >= {
+        "GET", "PUT", "DELETE"}
+
+    assert client.options('/contact', headers=preflight).status_code == 204
+    assert client.options('/resume/unknown', headers=preflight).status_code == 404
+    assert client.get('/resume/skill').headers["Access-Control-Allow-Origin"] == "*"
+
+    # Outside CORS_PREFLIGHT_PATHS, Flask answers and the same headers are added
+    response = client.options('/test', headers=dict(preflight, **{
+        "Access-Control-Request-Method": "GET"}))
+    assert response.status_code == 200
+    assert response.headers["Access-Control-Allow-Origin"] == "*"
+    assert response.headers["Access-Control-Allow-Headers"] == "content-type"
+    assert response.headers["Access-Control-Max-Age"] == "600"
+    assert "GET" in response.headers["Access-Control-Allow-Methods"].split(", ")
+
+
+def test_cors_restricted_origins():
+    '''With a list of origins only those origins get CORS headers.'''
+    client = create_app({"CORS_ORIGINS": ["https://ok.example"]}).test_client()
+    preflight = {"Access-Control-Request-Method": "POST"}
+
+    allowed = client.options('/resume/skill', headers=dict(preflight, Origin="https://ok.example"))
+    assert allowed.headers["Access-Control-Allow-Origin"] == "https://ok.example"
+    denied = client.options('/resume/skill', headers=dict(preflight, Origin="https://evil.example"))
+    assert "Access-Control-Allow-Origin" not in denied.headers
+    denied = client.options('/test', headers=dict(preflight, Origin="https://evil.example"))
+    assert "Access-Control-Allow-Methods" not in denied.headers
+    allowed = client.options('/test', headers=dict(preflight, Origin="https://ok.example"))
+    assert allowed.headers["Access-Control-Allow-Origin"] == "https://ok.example"
+    assert "GET" in allowed.headers["Access-Control-Allow-Methods"]
+
+    response = client.get('/resume/skill', headers={"Origin": "https://ok.example"})
+    assert response.headers["Access-Control-Allow-Origin"] == "https://ok.example"
+    assert "Origin" in response.headers["Vary"]
+
+
+def test_serve_options_autodetect():
+    '''serve runs one worker that is never recycled, with threads derived from the CPUs.'''
+    args = build_parser().parse_args(["serve"])
+    options = build_options(args, cpus=4)
+    assert options["bind"] == "0.0.0.0:8000"
+    assert options["workers"] == 1
+    assert options["max_requests"] == 0
+    # 8 request threads plus one per change stream
+    assert options["threads"] == 12
+    assert build_app_config(args, options) == {"CHANGES_MAX_STREAMS": 4}
+    assert options["worker_class"] == "gthread"
+    assert options["reuse_port"] is False
+
+    args = build_parser().parse_args(
+        ["serve", "--port", "9000", "--workers", "2", "--threads", "3", "--reuse-port"])
+    options = build_options(args, cpus=4)
+    assert (options["bind"], options["workers"], options["threads"]) == ("0.0.0.0:9000", 2, 3)
+    assert options["reuse_port"] is True
+    # Streams always leave a thread for other requests
+    assert build_app_config(args, options) == {"CHANGES_MAX_STREAMS": 2}
+
+    child = build_child_options(options)
+    assert (child["workers"], child["reuse_port"], child["bind"]) == (1, True, "0.0.0.0:9000")
+    assert child["control_socket_disable"] is True
+
+
+def test_sparse_fieldsets():
+    '''?fields= limits list, item, contact and delta responses to the listed fields.'''
+    client = create_app().test_client()
+    assert client.get('/resume/experience?fields=title,company').json == [
+        {"title": "Software Developer", "company": "A Cool Company"}
+    ]
+    assert client.get('/resume/experience/0?fields=logo').json == {"logo": "example-logo.png"}
+    assert client.get('/resume/education/0?fields=school,id').json == {
+        "school": "University of Tech", "id": 0
+    }
+    assert client.get('/resume/skill?fields=name').json == [{"name": "Python"}]
+    assert client.get('/resume/skill/0?fields=name, logo').json == {
+        "name": "Python", "logo": "example-logo.png"
+    }
+
+    delta = client.get('/resume/skill?since=0&fields=name').json
+    assert delta["changed"] == [{"name": "Python", "id": 0, "version": 3}]
+
+    client.post('/contact', json={
+        "name": "Jane Smith",
+        "email": "jane.smith@example.com",
+        "phone": "+19876543210",
+        "linkedin": "https://linkedin.com/in/janesmith",
+        "github": "https://github.com/janesmith"
+    })
+    assert client.get('/contact?fields=email').json == {"email": "jane.smith@example.com"}
+
+    response = client.get('/resume/skill?fields=name,salary')
+    assert response.status_code == 400
+    assert response.json == {"error": "Unknown field(s): salary"}
+
+
+def test_unique_constraints_reject_duplicates():
+    '''Configured uniqueness constraints turn duplicate inserts and edits into 409s.'''
+    client = create_app({"UNIQUE_CONSTRAINTS": {
+        "skill": ("name",),
+        "experience": ("company", "title", "start_date")
+    }}).test_client()
+    go_skill = {"name": "Go", "proficiency": "1 year", "logo": "go.png"}
+
+    go_id = client.post('/resume/skill', json=go_skill).json["id"]
+    response = client.post('/resume/skill', json=go_skill)
+    assert response.status_code == 409
+    assert response.json["id"] == go_id
+
+    # Renaming onto an existing name is a duplicate; renaming elsewhere frees the key
+    assert client.put(f'/resume/skill/{go_id}', json={"name": "Python"}).status_code == 409
+    assert client.put(f'/resume/skill/{go_id}', json={"name": "Golang"}).status_code == 200
+    assert client.post('/resume/skill', json=go_skill).status_code == 201
+
+    # Deleting releases the key
+    client.delete('/resume/skill/0')
+    assert client.post('/resume/skill', json={
+        "name": "Python", "proficiency": "5 years", "logo": "python.png"
+    }).status_code == 201
+
+    experience = client.get('/resume/experience/0').json
+    experience.pop("id")
+    assert client.post('/resume/experience', json=experience).status_code == 409
+    assert client.post('/resume/experience',
+                       json=dict(experience, start_date="May 2024")).status_code == 201
+
+
+def test_unique_constraints_in_batch_rollback():
+    '''A duplicate inside a batch fails it with 409 and restores the indexes.'''
+    client = create_app({"UNIQUE_CONSTRAINTS": {"skill": ("name",)}}).test_client()
+    response = client.post('/resume/batch', json={"operations": [
+        {"op": "update", "section": "skill", "id": 0, "data": {"name": "Rust"}},
+        {"op": "create", "section": "skill",
+         "data": {"name": "Python", "proficiency": "1 year", "logo": "py.png"}},
+        {"op": "create", "section": "skill",
+         "data": {"name": "Python", "proficiency": "2 years", "logo": "py.png"}}
+    ]})
+    assert response.status_code == 409
+    assert response.json["operation"] == 2
+
+    assert client.get('/resume/skill?fields=name').json == [{"name": "Python"}]
+    assert client.post('/resume/skill', json={
+        "name": "Rust", "proficiency": "1 year", "logo": "rust.png"
+    }).status_code == 201
+    assert client.post('/resume/skill', json={
+        "name": "Python", "proficiency": "1 year", "logo": "py.png"
+    }).status_code == 409
+
+
+def test_unique_constraints_reject_unhashable_values():
+    '''Lists or objects in unique fields are rejected with 400, also inside a batch.'''
+    client = create_app({"UNIQUE_CONSTRAINTS": {"skill": ("name",)}}).test_client()
+    go = {"name": "Go", "proficiency": "1 year", "logo": "go.png"}
+    response = client.post('/resume/skill', json=dict(go, name=["x"]))
+    assert response.status_code == 400
+    assert "name" in response.json["error"]
+    assert client.put('/resume/skill/0', json={"name": {"x": 1}}).status_code == 400
+
+    response = client.post('/resume/batch', json={"operations": [
+        {"op": "create", "section": "skill", "data": go},
+        {"op": "update", "section": "skill", "id": 0, "data": {"name": ["x"]}}
+    ]})
+    assert response.status_code == 400
+    assert response.json["operation"] == 1
+    assert client.get('/resume/skill?fields=name').json == [{"name": "Python"}]
+    assert client.get('/resume/stats').json["skill"]["count"] == 1
+    assert client.post('/resume/skill', json=go).status_code == 201
+
+
+def test_stats_follow_every_change():
+    '''GET /resume/stats reflects creates, edits, deletes and batches.'''
+    client = create_app().test_client()
+    client.post('/resume/skill', json={"name": "Go", "proficiency": "1-2 Years", "logo": "go.png"})
+    client.post('/resume/skill', json={"name": "C", "proficiency": "5 years", "logo": "c.png"})
+    client.put('/resume/skill/0', json={"proficiency": "3 years"})
+    client.delete('/resume/skill/2')
+    client.put('/resume/experience/0', json={"end_date": "October 2024"})
+    client.post('/resume/batch', json={"operations": [
+        {"op": "create", "section": "experience", "data": {
+            "title": "Intern", "company": "A Cool Company", "start_date": "Jan 2020",
+            "end_date": "July 2020", "description": "Learning", "logo": "logo.png"}},
+        {"op": "delete", "section": "education", "id": 0}
+    ]})
+
+    stats = client.get('/resume/stats').json
+    assert stats["skill"] == {"count": 2, "by_proficiency": {"3 years": 1, "1-2 Years": 1}}
+    assert stats["experience"]["count"] == 2
+    assert stats["experience"]["by_company"] == {"A Cool Company": 2}
+    # October 2022 - October 2024 plus January - July 2020
+    assert stats["experience"]["total_years"] == 2.5
+    assert stats["education"] == {"count": 0, "by_school": {}}
+
+
+def test_stats_ongoing_experience():
+    '''Ongoing positions count up to today; unparsable dates are reported.'''
+    stats = ResumeStats(today=lambda: datetime.date(2025, 4, 15))
+    stats.record({"op": "create", "section": "experience", "id": 0, "record": {
+        "company": "A", "start_date": "April 2024", "end_date": "Present"}})
+    stats.record({"op": "create", "section": "experience", "id": 1, "record": {
+        "company": "B", "start_date": "Sometime", "end_date": "Later"}})
+    assert stats.total_experience_months() == 12
+    assert stats.snapshot()["experience"]["unparsed_dates"] == 1
+
+    stats.record({"op": "delete", "section": "experience", "id": 0, "record": {}})
+    assert stats.total_experience_months() == 0
+    assert parse_month("Sept 2021") == 2021 * 12 + 8
+    assert parse_month("2021") == 2021 * 12
+    assert parse_month("Smarch 2021") is None
+
+
+def test_stats_non_string_dates():
+    '''Non-string dates are counted as unparsed instead of breaking the stats.'''
+    client = create_app().test_client()
+    experience = {
+        "title": "Contractor", "company": "Numbers Inc", "start_date": 2020,
+        "end_date": "Present", "description": "Ints", "logo": "logo.png"
+    }
+    assert client.post('/resume/experience', json=experience).status_code == 201
+    assert client.post('/resume/experience', json=dict(
+        experience, start_date="May 2020", end_date=2021)).status_code == 201
+
+    stats = client.get('/resume/stats').json["experience"]
+    assert stats["count"] == 3
+    assert stats["by_company"] == {"A Cool Company": 1, "Numbers Inc": 2}
+    assert stats["unparsed_dates"] == 2
+    assert parse_month(2020) is None
+
+
+def test_stats_non_string_groups():
+    '''Records whose group field is not a string are counted under OTHER_GROUP.'''
+    client = create_app().test_client()
+    skill = {"name": "Go", "proficiency": ["a"], "logo": "go.png"}
+    assert client.post('/resume/skill', json=skill).status_code == 201
+    assert client.post('/resume/skill', json=dict(skill, proficiency=3)).status_code == 201
+
+    stats = client.get('/resume/stats').json["skill"]
+    assert stats["count"] == 3
+    assert stats["by_proficiency"] == {"1-2 Years": 1, OTHER_GROUP: 2}
+    assert sum(stats["by_proficiency"].values()) == stats["count"]
+
+
+def test_render_only_links_web_urls():
+    '''Contact URLs that are not http(s) are rendered as text, not as links.'''
+    client = create_app().test_client()
+    client.post('/contact', json={
+        "name": "Jane Smith",
+        "email": "jane.smith@example.com",
+        "phone": "+19876543210",
+        "linkedin": "javascript:alert(document.domain)",
+        "github": "https://github.com/janesmith"
+    })
+
+    page = client.get('/resume/render').get_data(as_text=True)
+    assert 'href="javascript:' not in page
+    assert "<li>LinkedIn: javascript:alert(document.domain)</li>" in page
+    assert '<a href="https://github.com/janesmith">GitHub</a>' in page
+
+
+def test_rate_limit_behind_proxy_and_route_wide():
+    '''Trusted X-Forwarded-For identifies clients; the route-wide bucket caps all of them.'''
+    client = create_app({
+        "PROXY_FIX_X_FOR": 1, "RATELIMIT_RATE": 0.001, "RATELIMIT_BURST": 1
+    }).test_client()
+    first = {"X-Forwarded-For": "203.0.113.1"}
+    second = {"X-Forwarded-For": "203.0.113.2"}
+    assert client.get('/resume/skill', headers=first).status_code == 200
+    assert client.get('/resume/skill', headers=first).status_code == 429
+    assert client.get('/resume/skill', headers=second).status_code == 200
+
+    client = create_app({
+        "RATELIMIT_KEY_FUNC": lambda: request.headers.get("X-Api-Key"),
+        "RATELIMIT_ROUTE_RATE": 0.001, "RATELIMIT_ROUTE_BURST": 2
+    }).test_client()
+    for key in ("a", "b"):
+        assert client.get('/resume/skill', headers={"X-Api-Key": key}).status_code == 200
+    assert client.get('/resume/skill', headers={"X-Api-Key": "c"}).status_code == 429
+    assert client.get('/resume/education', headers={"X-Api-Key": "c"}).status_code == 200
+
+
+def test_rejection_follows_content_negotiation():
+    '''A 429 is encoded in the format the client asked for.'''
+    client = create_app({"RATELIMIT_RATE": 0.001, "RATELIMIT_BURST": 1}).test_client()
+    headers = {"Accept": "application/msgpack"}
+    client.get('/resume/skill', headers=headers)
+    response = client.get('/resume/skill', headers=headers)
+    assert response.status_code == 429
+    assert response.mimetype == "application/msgpack"
+    assert "error" in msgpack.unpackb(response.data)
+    assert "Accept" in response.vary
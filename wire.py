@@ -0,0 +1,131 @@
+'''
+Content negotiation for the Resume API.
+
+Responses are encoded in the format the client asks for in ``Accept`` and
+request bodies are decoded according to ``Content-Type``. JSON is the
+default; MessagePack and CBOR are offered when ``msgpack`` / ``cbor2`` are
+installed.
+'''
+import dataclasses
+
+from flask import current_app, jsonify, request
+from werkzeug.exceptions import BadRequest
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:  # pragma: no cover - optional dependency
+    cbor2 = None
+
+JSON = "application/json"
+
+
+def _to_builtin(obj):
+    '''Encode model objects (dataclasses) as dicts for the binary encoders.'''
+    if dataclasses.is_dataclass(obj):
+        return dataclasses.asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+# mimetype -> (encode, decode)
+CODECS = {}
+if msgpack is not None:
+    CODECS["application/msgpack"] = (
+        lambda payload: msgpack.packb(payload, default=_to_builtin),
+        lambda body: msgpack.unpackb(body, strict_map_key=False),
+    )
+    CODECS["application/x-msgpack"] = CODECS["application/msgpack"]
+if cbor2 is not None:
+    CODECS["application/cbor"] = (
+        lambda payload: cbor2.dumps(payload, default=lambda _, obj: _to_builtin(obj)),
+        cbor2.loads,
+    )
+
+OFFERED = [JSON, *CODECS]
+
+# Types a JSON body can decode to; other formats are limited to the same
+SCALARS = (str, int, float, bool, type(None))
+
+
+def negotiate():
+    '''Return the response mimetype for the current request (JSON unless asked otherwise).'''
+    if not request.accept_mimetypes:
+        return JSON
+    return request.accept_mimetypes.best_match(OFFERED, default=JSON)
+
+
+def respond(payload):
+    '''
+    Build a response for ``payload`` in the negotiated format.
+
+    Drop-in replacement for ``jsonify`` in the route handlers.
+
+    Args:
+        payload: JSON-compatible data, possibly containing model objects
+
+    Returns:
+        flask.Response: The encoded payload, with ``Vary: Accept``
+    '''
+    mimetype = negotiate()
+    if mimetype == JSON:
+        response = jsonify(payload)
+    else:
+        response = current_app.response_class(CODECS[mimetype][0](payload), mimetype=mimetype)
+    response.vary.add("Accept")
+    return response
+
+
+def is_json_compatible(value):
+    '''
+    Return whether ``value`` only contains types that JSON can represent.
+
+    Rejects e.g. byte strings, non-string map keys and CBOR tags, which binary
+    bodies can carry but JSON responses and the change feed cannot encode.
+    '''
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, SCALARS):
+            continue
+        if isinstance(item, list):
+            stack.extend(item)
+        elif isinstance(item, dict) and all(isinstance(key, str) for key in item):
+            stack.extend(item.values())
+        else:
+            return False
+    return True
+
+
+def read_body(silent=False):
+    '''
+    Decode the request body according to its ``Content-Type``.
+
+    Args:
+        silent (bool): Return None instead of raising for undecodable bodies
+
+    Returns:
+        The decoded body; JSON bodies are read with ``request.get_json``
+
+    Raises:
+        werkzeug.exceptions.BadRequest: If a binary body cannot be decoded or
+                                        contains values JSON cannot represent
+    '''
+    codec = CODECS.get(request.mimetype)
+    if codec is None:
+        return request.get_json(silent=silent)
+    try:
+        body = codec[1](request.get_data())
+    except Exception as e:  # pylint: disable=broad-except
+        if silent:
+            return None
+        raise BadRequest(f"Failed to decode {request.mimetype} body") from e
+    if not is_json_compatible(body):
+        if silent:
+            return None
+        raise BadRequest(f"{request.mimetype} body contains values that are not "
+                         "JSON-compatible")
+    return body